@@ -13,14 +13,26 @@
 # -----------------------------------------------------------------
 
 # Main imports
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from contextlib import asynccontextmanager
 import logging
 
 # Routes
-from app.routes import auth, admin, health, dashboard, patient, monitoring, patient_crud
+from app.routes import auth, admin, health, dashboard, patient, monitoring, patient_crud, ccow, metrics
+
+# Background services
+from app.services.session_activity import activity_tracker
+from app.services.session_reaper import session_reaper
+from app.services.ccow_service import ccow_service
+from app.services.ccow_broker import ccow_broker
+from app.services.invalidation_bus import invalidation_bus
+from app.services.password_verifier import password_verifier
+from app.services.audit_log import audit_log
+from app.services.metrics import MetricsMiddleware
+from database import replica_router
 
 # Import 'settings' object from root-level config file
 from config import settings
@@ -56,8 +68,36 @@ print(f"         VistA Base URL: {settings.vista.base_url}")
 print(f"  VistA Health Endpoint: {settings.vista.health_endpoint}")
 print()
 
+# -----------------------------------------------------------------
+# Application Lifespan
+# -----------------------------------------------------------------
+# Starts background services on startup and drains them on shutdown.
+# -----------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ccow_service.start()     # Shared, pooled CCOW Vault client
+    audit_log.start()              # Batched auth.audit_logs writer
+    activity_tracker.start()
+    session_reaper.start()         # Deactivate expired auth.sessions rows in batches
+    await invalidation_bus.start()  # LISTEN for cache invalidations from other workers
+    await replica_router.start()    # Poll read-replica lag (no-op without POSTGRES_REPLICA_HOSTS)
+    yield
+    await replica_router.stop()
+    await invalidation_bus.stop()
+    await ccow_broker.close()      # Stop per-user context watchers
+    await session_reaper.stop()
+    await activity_tracker.stop()  # Final flush of pending last_activity_at updates
+    await ccow_service.close()
+    await audit_log.stop()         # Drain queued audit events (after the last producers stop)
+    password_verifier.close()      # bcrypt worker threads
+
+
 # Initialize the FastAPI app
-app = FastAPI(title=settings.app.name, debug=settings.app.debug)
+app = FastAPI(title=settings.app.name, debug=settings.app.debug, lifespan=lifespan)
+
+# Per-route request count, latency and in-flight metrics (served at /metrics)
+if settings.app.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 # Mount the static files directory
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -74,6 +114,8 @@ app.include_router(health.router, tags=["health"])
 app.include_router(patient_crud.router, tags=["patient-crud"])  # Register before patient.router to avoid route conflicts
 app.include_router(patient.router, tags=["patient"])
 app.include_router(monitoring.router, tags=["monitoring"])
+app.include_router(ccow.router, tags=["ccow"])
+app.include_router(metrics.router, tags=["metrics"])
 
 
 # Create root route handler
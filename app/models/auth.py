@@ -63,4 +63,5 @@ class AuditLog(Base):
     user_agent = Column(String)
     success = Column(Boolean)
     failure_reason = Column(String)
-    session_id = Column(UUID(as_uuid=True))
\ No newline at end of file
+    session_id = Column(UUID(as_uuid=True))
+    patient_icn = Column(String(50))  # Added by db/ddl/alter_audit_logs_add_patient_icn.sql
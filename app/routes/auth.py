@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from app.services.auth_service import authenticate_user, create_session, invalidate_session
+from app.services.password_verifier import LoginBusy
 
 from config import settings
 
@@ -38,7 +39,19 @@ async def login(
     user_agent = request.headers.get("user-agent", "unknown")
 
     # Authenticate user with database
-    user = await authenticate_user(db, email, password)
+    try:
+        user = await authenticate_user(db, email, password, ip_address, user_agent)
+    except LoginBusy:
+        return templates.TemplateResponse(
+            "login.html",
+            {
+                "request": request,
+                "settings": settings,
+                "error": "Sign-in is busy. Please try again in a moment."
+            },
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "2"}
+        )
 
     if not user:
         return templates.TemplateResponse(
@@ -76,7 +89,11 @@ async def logout(request: Request, db: AsyncSession = Depends(get_db)):
 
     if session_id:
         # Invalidate session in database
-        await invalidate_session(db, session_id)
+        await invalidate_session(
+            db, session_id,
+            ip_address=request.client.host,
+            user_agent=request.headers.get("user-agent", "unknown")
+        )
 
     response = RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
     response.delete_cookie(key=settings.session.cookie_name)
@@ -0,0 +1,112 @@
+# -----------------------------------------------------------
+# app/routes/ccow.py
+# -----------------------------------------------------------
+# CCOW context push channel (WebSocket) for the dashboard
+# -----------------------------------------------------------
+
+from fastapi import APIRouter, WebSocket, status
+from fastapi.templating import Jinja2Templates
+from typing import Optional, Dict, Any
+import asyncio
+import logging
+
+from database import AsyncSessionLocal
+from app.services.auth_service import validate_session
+from app.services.ccow_broker import ccow_broker
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+templates = Jinja2Templates(directory="app/templates")
+
+# How often an open socket re-checks that its session is still valid
+SESSION_RECHECK_SECONDS = 60
+
+
+def render_context_push(context: Dict[str, Any], current_icn: Optional[str]) -> str:
+    """
+    Render one push message: the CCOW banner and the change notification.
+    Both fragments carry their element id, so the HTMX ws extension swaps
+    them into the page out-of-band.
+    """
+    banner_context = context if context.get("patient_id") else None
+    banner_html = templates.get_template("partials/ccow_banner.html").render(context=banner_context)
+    notification_html = templates.get_template("partials/ccow_notification.html").render(
+        patient_id=context.get("patient_id"),
+        patient_name=context.get("patient_name"),
+        current_icn=current_icn,
+    )
+    return f'{banner_html}\n<div id="context-notification">{notification_html}</div>'
+
+
+async def _session_user(session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Validate the session cookie outside of a request-scoped dependency."""
+    if not session_id:
+        return None
+    async with AsyncSessionLocal() as db:
+        return await validate_session(db, session_id)
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    """Consume client frames until the browser closes the socket."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/ccow/ws")
+async def ccow_context_ws(websocket: WebSocket, current_icn: Optional[str] = None):
+    """
+    Push CCOW context changes to a dashboard tab.
+    Replaces the 5-second /context/banner and /ccow/poll polling: one
+    server-side watcher per user fans changes out to all of that user's tabs.
+    """
+    session_id = websocket.cookies.get(settings.session.cookie_name)
+    user_info = await _session_user(session_id)
+
+    if not user_info:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    user_id = user_info["user_id"]
+    queue = ccow_broker.subscribe(user_id, session_id)
+    disconnect = asyncio.create_task(_wait_for_disconnect(websocket))
+
+    try:
+        while True:
+            next_context = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait(
+                {next_context, disconnect},
+                timeout=SESSION_RECHECK_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if disconnect in done:
+                next_context.cancel()
+                break
+
+            if next_context not in done:
+                # Idle: make sure the session has not been logged out or expired
+                next_context.cancel()
+                if not await _session_user(session_id):
+                    await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                    break
+                continue
+
+            context = next_context.result()
+            if context is None:
+                # Broker shutting down
+                await websocket.close(code=status.WS_1012_SERVICE_RESTART)
+                break
+
+            await websocket.send_text(render_context_push(context, current_icn))
+
+    except Exception as e:
+        logger.debug(f"CCOW push socket closed: {e}")
+    finally:
+        disconnect.cancel()
+        ccow_broker.unsubscribe(user_id, queue)
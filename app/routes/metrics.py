@@ -0,0 +1,111 @@
+# -----------------------------------------------------------
+# app/routes/metrics.py
+# -----------------------------------------------------------
+# Prometheus scrape endpoint (text exposition format)
+# -----------------------------------------------------------
+
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from database import engine, replica_router
+from app.services.metrics import registry, gauge_lines, counter_lines
+from app.services.pool_stats import get_pool_status
+from app.services.password_verifier import password_verifier
+from app.services.audit_log import audit_log
+from app.services.session_cache import session_cache
+from app.services.demographics_cache import demographics_cache
+from app.services.invalidation_bus import invalidation_bus
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _cache_metrics() -> List[str]:
+    """Session and demographics cache size and counters, read at scrape time."""
+    caches = {"session": session_cache.stats(), "demographics": demographics_cache.stats()}
+    lines = gauge_lines(
+        "medz4_cache_size", "Entries currently cached.",
+        {name: stats["size"] for name, stats in caches.items()}, label="cache"
+    )
+    for field, doc in (
+        ("hits", "Cache hits since startup."),
+        ("misses", "Cache misses since startup."),
+        ("evictions", "Entries evicted (TTL, LRU or invalidation) since startup."),
+    ):
+        lines.extend(counter_lines(
+            f"medz4_cache_{field}_total", doc,
+            {name: stats[field] for name, stats in caches.items()}, label="cache"
+        ))
+    return lines
+
+
+def _invalidation_metrics() -> List[str]:
+    """Cross-worker invalidation bus state, read at scrape time."""
+    stats = invalidation_bus.stats()
+    return (
+        gauge_lines("medz4_invalidation_listener_connected", "1 if the LISTEN connection is up.",
+                    {"": 1 if stats["connected"] else 0})
+        + counter_lines("medz4_invalidation_messages_total", "Invalidation messages by direction since startup.",
+                        {"published": stats["published"], "received": stats["received"],
+                         "publish_errors": stats["publish_errors"]}, label="direction")
+        + counter_lines("medz4_invalidation_reconnects_total", "Listener reconnect attempts since startup.",
+                        {"": stats["reconnects"]})
+    )
+
+
+def _pool_metrics() -> List[str]:
+    """Connection pool occupancy, read at scrape time."""
+    pool = get_pool_status(engine.pool)
+    return gauge_lines(
+        "medz4_db_pool_connections", "Pooled connections by state (overflow is part of checked_out).",
+        {"checked_out": pool["checked_out"], "idle": pool["idle"], "overflow": pool["overflow"]}, label="state"
+    ) + gauge_lines(
+        "medz4_db_pool_capacity", "pool_size + max_overflow for this worker.", {"": pool["capacity"]}
+    )
+
+
+def _replica_metrics() -> List[str]:
+    """Read-replica lag and rotation state, read at scrape time."""
+    replicas = replica_router.stats()["replicas"]
+    if not replicas:
+        return []
+    return gauge_lines(
+        "medz4_db_replica_lag_seconds", "Replica replay lag (-1 when unreachable).",
+        {replica["name"]: -1 if replica["lag_seconds"] is None else replica["lag_seconds"] for replica in replicas},
+        label="replica"
+    ) + gauge_lines(
+        "medz4_db_replica_in_rotation", "1 if get_read_db may route reads to this replica.",
+        {replica["name"]: 1 if replica["in_rotation"] else 0 for replica in replicas}, label="replica"
+    )
+
+
+def _password_metrics() -> List[str]:
+    """Password verification queue depth, read at scrape time."""
+    stats = password_verifier.stats()
+    return gauge_lines(
+        "medz4_password_verify_queue", "Logins waiting for, or running, bcrypt verification.",
+        {"waiting": stats["waiting"], "in_progress": stats["in_progress"]}, label="state"
+    )
+
+
+def _audit_metrics() -> List[str]:
+    """Audit pipeline queue depth, read at scrape time."""
+    return gauge_lines("medz4_audit_queue_depth", "Audit events waiting to be written.",
+                       {"": audit_log.queue_depth()})
+
+
+registry.add_collector(_cache_metrics)
+registry.add_collector(_audit_metrics)
+registry.add_collector(_password_metrics)
+registry.add_collector(_pool_metrics)
+registry.add_collector(_replica_metrics)
+registry.add_collector(_invalidation_metrics)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Per-worker metrics in Prometheus text format (scrape each worker)."""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
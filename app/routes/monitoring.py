@@ -10,9 +10,15 @@ from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from database import get_db
+from database import get_read_db, engine, replica_router
 from app.services.auth_service import validate_session
 from app.services import monitoring_service
+from app.services.ccow_service import ccow_service
+from app.services.session_cache import session_cache
+from app.services.demographics_cache import demographics_cache
+from app.services.invalidation_bus import invalidation_bus
+from app.services.query_stats import query_stats
+from app.services.pool_stats import get_pool_status
 from config import settings
 
 router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
@@ -22,13 +28,43 @@ templates = Jinja2Templates(directory="app/templates")
 @router.get("/sessions", response_class=HTMLResponse)
 async def get_sessions_monitor(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
 ):
     """
-    Display active sessions table.
+    Display active sessions monitor (filters plus first page).
     Requires valid session authentication.
     """
+    return await _render_sessions(request, db, session_id, "partials/monitoring_sessions.html")
+
+
+@router.get("/sessions-table", response_class=HTMLResponse)
+async def get_sessions_table(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name),
+    user: Optional[str] = None,
+    ip: Optional[str] = None,
+    cursor: Optional[str] = None,
+    direction: str = "next"
+):
+    """
+    Return one active-sessions page (for HTMX swap on filter changes and
+    next/prev pagination).
+    """
+    return await _render_sessions(
+        request, db, session_id, "partials/monitoring_sessions_table.html",
+        user=user, ip=ip, cursor=cursor, direction=direction
+    )
+
+
+async def _render_sessions(
+    request: Request,
+    db: AsyncSession,
+    session_id: Optional[str],
+    template: str,
+    **filters
+):
     # Validate session
     user_info = await validate_session(db, session_id) if session_id else None
     if not user_info:
@@ -38,8 +74,8 @@ async def get_sessions_monitor(
         </div>
         """
 
-    # Fetch sessions data
-    data = await monitoring_service.get_active_sessions(db)
+    # Fetch sessions data (summary counts and one keyset page)
+    data = await monitoring_service.get_active_sessions(db, **filters)
 
     if not data.get("success"):
         return f"""
@@ -49,11 +85,13 @@ async def get_sessions_monitor(
         """
 
     return templates.TemplateResponse(
-        "partials/monitoring_sessions.html",
+        template,
         {
             "request": request,
             "summary": data.get("summary"),
-            "sessions": data.get("sessions", [])
+            "sessions": data.get("sessions", []),
+            "next_cursor": data.get("next_cursor"),
+            "prev_cursor": data.get("prev_cursor")
         }
     )
 
@@ -61,11 +99,13 @@ async def get_sessions_monitor(
 @router.get("/database", response_class=HTMLResponse)
 async def get_database_monitor(
     request: Request,
-    db: AsyncSession = Depends(get_db),
-    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name),
+    exact: bool = False
 ):
     """
     Display database health check results.
+    Default probe uses catalog statistics; ?exact=true counts rows.
     """
     # Validate session
     user_info = await validate_session(db, session_id) if session_id else None
@@ -77,18 +117,36 @@ async def get_database_monitor(
         """
 
     # Fetch database health
-    data = await monitoring_service.get_database_health(db)
+    data = await monitoring_service.get_database_health(db, exact=exact)
 
     color = "green" if data.get("success") else "red"
 
     if data.get("success"):
+        if data.get("patient_count") is None:
+            patients = "Unknown (table not analyzed yet)"
+        elif data.get("exact"):
+            patients = f"{data.get('patient_count'):,} (exact)"
+        else:
+            patients = f"~{data.get('patient_count'):,} (estimate)"
+        hit_ratio = data.get("cache_hit_ratio")
+        hit_ratio = f"{hit_ratio}%" if hit_ratio is not None else "N/A"
         return f"""
         <div class="success-msg" style="border-color: {color};">
             <strong>Database Status:</strong> {data.get('status')}<br>
-            <strong>Patients:</strong> {data.get('patient_count'):,}<br>
+            <strong>Patients:</strong> {patients}<br>
             <strong>Last ETL:</strong> {data.get('last_etl_update')}<br>
+            <strong>Latency (SELECT 1):</strong> {data.get('latency_ms')}ms<br>
+            <strong>Cache Hit Ratio:</strong> {hit_ratio}<br>
+            <strong>Backends:</strong> {data.get('active_backends')} active / {data.get('connections')} connected<br>
+            <strong>Deadlocks:</strong> {data.get('deadlocks')}<br>
             <strong>Response Time:</strong> {data.get('response_time_ms')}ms
         </div>
+        <button hx-get="/monitoring/database?exact=true"
+                hx-target="#monitoring-results"
+                hx-swap="innerHTML"
+                class="btn-sm">
+            Exact Count
+        </button>
         """
     else:
         return f"""
@@ -102,7 +160,7 @@ async def get_database_monitor(
 @router.get("/medz1", response_class=HTMLResponse)
 async def get_medz1_monitor(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
 ):
     """
@@ -140,7 +198,7 @@ async def get_medz1_monitor(
 @router.get("/ccow-patients", response_class=HTMLResponse)
 async def get_ccow_patients_monitor(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
 ):
     """
@@ -178,7 +236,7 @@ async def get_ccow_patients_monitor(
 @router.get("/ccow-history", response_class=HTMLResponse)
 async def get_ccow_history_monitor(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
 ):
     """
@@ -211,3 +269,121 @@ async def get_ccow_history_monitor(
             "history": data.get("history", [])
         }
     )
+
+
+@router.get("/ccow-lookups", response_class=HTMLResponse)
+async def get_ccow_lookups_monitor(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+):
+    """
+    Display CCOW single-flight lookup metrics: totals for all sessions and
+    hits/coalesced/calls for the caller's own session only.
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="error-msg">
+            <strong>Error:</strong> Authentication required
+        </div>
+        """
+
+    return templates.TemplateResponse(
+        "partials/monitoring_ccow_lookups.html",
+        {
+            "request": request,
+            "stats": ccow_service.lookup_stats(session_id)
+        }
+    )
+
+
+@router.get("/caches", response_class=HTMLResponse)
+async def get_caches_monitor(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+):
+    """
+    Display in-process cache metrics (size, hits, misses, evictions).
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="error-msg">
+            <strong>Error:</strong> Authentication required
+        </div>
+        """
+
+    return templates.TemplateResponse(
+        "partials/monitoring_caches.html",
+        {
+            "request": request,
+            "caches": {
+                "Sessions": session_cache.stats(),
+                "Demographics": demographics_cache.stats(),
+            },
+            "bus": invalidation_bus.stats()
+        }
+    )
+
+
+@router.get("/queries", response_class=HTMLResponse)
+async def get_queries_monitor(
+    request: Request,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+):
+    """
+    Display the top N SQL statements (by fingerprint) by total execution time.
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="error-msg">
+            <strong>Error:</strong> Authentication required
+        </div>
+        """
+
+    return templates.TemplateResponse(
+        "partials/monitoring_queries.html",
+        {
+            "request": request,
+            "summary": query_stats.stats(),
+            "queries": query_stats.top(max(1, min(limit, 100)))
+        }
+    )
+
+
+@router.get("/pool", response_class=HTMLResponse)
+async def get_pool_monitor(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+):
+    """
+    Display connection pool occupancy (checked out, idle, overflow), checkout
+    waits, and read-replica routing state.
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="error-msg">
+            <strong>Error:</strong> Authentication required
+        </div>
+        """
+
+    return templates.TemplateResponse(
+        "partials/monitoring_pool.html",
+        {
+            "request": request,
+            "pool": get_pool_status(engine.pool),
+            "statement_cache_size": settings.postgres.statement_cache_size,
+            "replicas": replica_router.stats()
+        }
+    )
@@ -2,22 +2,25 @@
 # app/routes/patient.py
 # -----------------------------------------------------------
 
-from fastapi import APIRouter, Request, Cookie, Depends
+from fastapi import APIRouter, Request, Cookie, Depends, BackgroundTasks
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import logging
 
-from database import get_db
+from database import get_read_db
 from app.services.auth_service import validate_session
 from app.services.ccow_service import ccow_service
+from app.services.audit_log import audit_log
 from app.services.patient_service import (
     get_patient_demographics,
     get_patient_vitals,
     get_patient_allergies,
     get_patient_medications,
-    get_patient_clinical_notes
+    get_patient_clinical_notes,
+    get_patient_clinical_sections,
+    get_patient_chart
 )
 from config import settings
 
@@ -30,12 +33,16 @@ logger = logging.getLogger(__name__)
 async def patient_detail(
     icn: str,
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_read_db),
     session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
 ):
     """
     Display patient detail page with clinical data.
-    Automatically sets CCOW context to this patient.
+    Automatically sets CCOW context to this patient (in the background).
+
+    By default (APP_PATIENT_SECTIONS_LAZY) only demographics are rendered;
+    each clinical section loads from /patient/{icn}/section/* when revealed.
     """
 
     # Validate session
@@ -44,22 +51,29 @@ async def patient_detail(
     if not user_info:
         return RedirectResponse(url="/login", status_code=303)
 
-    # Fetch patient demographics
-    patient = await get_patient_demographics(db, icn)
+    if settings.app.patient_chart_single_query:
+        # One round trip: demographics and all sections via json_agg
+        chart = await get_patient_chart(db, icn)
+        patient = chart.pop("patient") if chart else None
+        sections = chart
+    else:
+        # Fetch patient demographics
+        patient = await get_patient_demographics(db, icn)
+        sections = None
 
     if not patient:
         # Patient not found - redirect to dashboard
         logger.warning(f"Patient not found: {icn}")
         return RedirectResponse(url="/dashboard", status_code=303)
 
-    # Automatically set CCOW context to this patient
-    await ccow_service.set_active_patient(session_id, icn)
+    await audit_log.log("patient_view", user=user_info, patient_icn=icn)
 
-    # Fetch clinical data
-    vitals = await get_patient_vitals(db, patient["patient_key"])
-    allergies = await get_patient_allergies(db, patient["patient_key"])
-    medications = await get_patient_medications(db, patient["patient_key"])
-    clinical_notes = await get_patient_clinical_notes(db, patient["patient_key"])
+    # Automatically set CCOW context to this patient (runs after the page is sent)
+    background_tasks.add_task(ccow_service.set_active_patient, session_id, icn)
+
+    if sections is None and not settings.app.patient_sections_lazy:
+        # Fetch clinical sections concurrently, each on its own pooled connection
+        sections = await get_patient_clinical_sections(patient["patient_key"], session_id)
 
     return templates.TemplateResponse(
         "patient_detail.html",
@@ -68,9 +82,59 @@ async def patient_detail(
             "settings": settings,
             "user": user_info,
             "patient": patient,
-            "vitals": vitals,
-            "allergies": allergies,
-            "medications": medications,
-            "clinical_notes": clinical_notes,
+            **(sections or {}),
+        }
+    )
+
+
+# Section name -> (template, template variable, patient_service loader)
+SECTION_LOADERS = {
+    "vitals": ("partials/patient_section_vitals.html", "vitals", get_patient_vitals),
+    "allergies": ("partials/patient_section_allergies.html", "allergies", get_patient_allergies),
+    "medications": ("partials/patient_section_medications.html", "medications", get_patient_medications),
+    "notes": ("partials/patient_section_notes.html", "clinical_notes", get_patient_clinical_notes),
+}
+
+
+@router.get("/patient/{icn}/section/{section}", response_class=HTMLResponse)
+async def patient_section(
+    icn: str,
+    section: str,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+):
+    """
+    HTMX fragment for one patient detail section (vitals, allergies,
+    medications, notes). Loaded lazily when the section is revealed.
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="error-msg">
+            <strong>Error:</strong> Authentication required
+        </div>
+        """
+
+    loader = SECTION_LOADERS.get(section)
+    if not loader:
+        return HTMLResponse('<div class="error-msg">Unknown section</div>', status_code=404)
+
+    template_name, variable, fetch = loader
+
+    # Resolve the ICN to patient_key (served from the demographics cache)
+    patient = await get_patient_demographics(db, icn)
+    if not patient:
+        logger.warning(f"Patient not found: {icn}")
+        return HTMLResponse('<div class="error-msg">Patient not found</div>', status_code=404)
+
+    items = await fetch(db, patient["patient_key"])
+
+    return templates.TemplateResponse(
+        template_name,
+        {
+            "request": request,
+            variable: items,
         }
     )
\ No newline at end of file
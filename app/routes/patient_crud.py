@@ -4,18 +4,20 @@
 # Patient demographics CRUD route handlers
 # -----------------------------------------------------------
 
-from fastapi import APIRouter, Request, Form, Depends, Cookie
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Request, Form, Depends, Cookie, File, UploadFile, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
-from typing import Optional
+from typing import Optional, List
+import html
 import logging
 
-from database import get_db
+from database import get_db, get_read_db
 from app.services.auth_service import validate_session
-from app.services import patient_crud_service
+from app.services import patient_crud_service, patient_service, patient_import_service, patient_export_service
 from app.services.ccow_service import ccow_service
+from app.services.invalidation_bus import invalidation_bus
+from app.services.audit_log import audit_log
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -27,7 +29,7 @@ templates = Jinja2Templates(directory="app/templates")
 @router.get("/create-form", response_class=HTMLResponse)
 async def get_create_patient_form(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
 ):
     """
@@ -125,13 +127,15 @@ async def create_patient(
         )
 
     # Create patient
-    result = await patient_crud_service.create_patient(db, patient_data)
+    result = await patient_crud_service.create_patient(db, patient_data, session_id)
 
     if not result["success"]:
         return f"""
         <div class="toast toast-error">Error: {result['error']}</div>
         """
 
+    await audit_log.log("patient_create", user=user_info, patient_icn=result["icn"])
+
     # Set CCOW context to newly created patient (non-blocking - don't fail if CCOW unavailable)
     try:
         await ccow_service.set_active_patient(
@@ -152,11 +156,87 @@ async def create_patient(
     """
 
 
+@router.get("/import-form", response_class=HTMLResponse)
+async def get_import_patients_form(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+):
+    """
+    Return modal HTML for bulk patient import (CSV or NDJSON upload).
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="toast toast-error">Authentication required</div>
+        """
+
+    return templates.TemplateResponse(
+        "partials/patient_import_form.html",
+        {
+            "request": request,
+            "settings": settings,
+            "fields": patient_import_service.IMPORT_FIELDS
+        }
+    )
+
+
+@router.post("/import", response_class=HTMLResponse)
+async def import_patients(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name),
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Form(None, alias="format")
+):
+    """
+    Bulk import patients from an uploaded CSV or NDJSON file.
+    Rows are streamed from the upload, validated and loaded with COPY in
+    batches; returns a summary with a per-line error report.
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="toast toast-error">Authentication required</div>
+        """
+
+    fmt = patient_import_service.detect_format(file.filename, file_format)
+    if not fmt:
+        return """
+        <div class="toast toast-error">Unsupported file type (use .csv, .ndjson or .jsonl)</div>
+        """
+
+    try:
+        summary = await patient_import_service.import_patients(file.file, fmt)
+        if summary["imported"]:
+            await invalidation_bus.note_session_write(session_id)
+            await audit_log.log("patient_import", user=user_info)
+    except Exception as e:
+        logger.error(f"Patient import failed: {e}")
+        return f"""
+        <div class="toast toast-error">Import failed: {html.escape(str(e))}</div>
+        """
+    finally:
+        await file.close()
+
+    return templates.TemplateResponse(
+        "partials/patient_import_result.html",
+        {
+            "request": request,
+            "settings": settings,
+            "filename": file.filename,
+            "summary": summary
+        }
+    )
+
+
 @router.get("/{icn}/edit-form", response_class=HTMLResponse)
 async def get_edit_patient_form(
     icn: str,
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
 ):
     """
@@ -267,13 +347,15 @@ async def update_patient(
         )
 
     # Update patient
-    result = await patient_crud_service.update_patient(db, icn, patient_data)
+    result = await patient_crud_service.update_patient(db, icn, patient_data, session_id)
 
     if not result["success"]:
         return f"""
         <div class="toast toast-error">Error: {result['error']}</div>
         """
 
+    await audit_log.log("patient_update", user=user_info, patient_icn=icn)
+
     # Success: Return response that closes modal + shows toast + refreshes
     return f"""
     <div class="toast toast-success">Patient updated: {result['name_display']} ({result['icn']})</div>
@@ -311,13 +393,15 @@ async def delete_patient(
     is_active_patient = active_patient and active_patient.get("patient_id") == icn
 
     # Delete patient (cascades to all clinical data)
-    result = await patient_crud_service.delete_patient(db, icn)
+    result = await patient_crud_service.delete_patient(db, icn, session_id)
 
     if not result["success"]:
         return f"""
         <div class="toast toast-error">Error: {result['error']}</div>
         """
 
+    await audit_log.log("patient_delete", user=user_info, patient_icn=icn)
+
     # If deleted patient was active CCOW context, clear it
     if is_active_patient:
         try:
@@ -342,14 +426,77 @@ async def delete_patient(
     """
 
 
+@router.post("/bulk-delete", response_class=HTMLResponse)
+async def bulk_delete_patients(
+    db: AsyncSession = Depends(get_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name),
+    icns: List[str] = Form([])
+):
+    """
+    Delete several patients (hard delete with cascade to clinical data) in
+    one statement. Accepts repeated icns fields (roster checkboxes); each
+    value may also hold a comma/whitespace-separated list.
+    If the active CCOW patient is among them, clears the context.
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return """
+        <div class="toast toast-error">Authentication required</div>
+        """
+
+    keys = [icn.strip() for value in icns for icn in value.replace(",", " ").split()]
+    if not keys:
+        return """
+        <div class="toast toast-error">No patients selected</div>
+        """
+
+    # Check if the active CCOW patient is in the batch
+    active_patient = await ccow_service.get_active_patient(session_id)
+    active_icn = active_patient.get("patient_id") if active_patient else None
+
+    result = await patient_crud_service.delete_patients(db, keys, session_id)
+
+    if not result["success"]:
+        return f"""
+        <div class="toast toast-error">Error: {html.escape(result['error'])}</div>
+        """
+
+    for deleted_icn in result["deleted"]:
+        await audit_log.log("patient_delete", user=user_info, patient_icn=deleted_icn)
+
+    if active_icn and active_icn in result["deleted"]:
+        try:
+            await ccow_service.clear_active_patient(session_id)
+            logger.info(f"Cleared CCOW context after deleting active patient: {active_icn}")
+        except Exception as e:
+            logger.error(f"Failed to clear CCOW context after bulk deletion: {e}")
+
+    not_found = f" ({len(result['not_found'])} not found)" if result["not_found"] else ""
+    return f"""
+    <div class="toast toast-success">Patients deleted: {len(result['deleted'])}{not_found}</div>
+    <script>
+        document.querySelector('#roster-refresh-trigger').click();
+    </script>
+    """
+
+
 @router.get("/roster-table", response_class=HTMLResponse)
 async def get_roster_table(
     request: Request,
-    db: AsyncSession = Depends(get_db),
-    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name),
+    name: Optional[str] = None,
+    icn: Optional[str] = None,
+    ssn_last4: Optional[str] = None,
+    station: Optional[str] = None,
+    cursor: Optional[str] = None,
+    direction: str = "next",
+    active_icn: Optional[str] = None
 ):
     """
-    Return refreshed patient roster table (for HTMX swap after CRUD operations).
+    Return a patient roster page (for HTMX swap after CRUD operations,
+    filter changes and next/prev pagination).
     """
     # Validate session
     user_info = await validate_session(db, session_id) if session_id else None
@@ -358,31 +505,124 @@ async def get_roster_table(
         <p>Authentication required</p>
         """
 
-    # Fetch patients (same query as dashboard)
-    result = await db.execute(
-        text("""
-            SELECT
-                patient_key,
-                icn,
-                name_display,
-                dob,
-                age,
-                sex,
-                ssn_last4,
-                primary_station
-            FROM clinical.patient_demographics
-            ORDER BY name_last, name_first
-            LIMIT 50
-        """)
+    # Keyset-paginated roster page (same query as dashboard)
+    roster = await patient_service.get_patient_roster(
+        db,
+        name=name,
+        icn=icn,
+        ssn_last4=ssn_last4,
+        station=station,
+        cursor=cursor,
+        direction=direction
     )
 
-    patients = [dict(row._mapping) for row in result.fetchall()]
-
     return templates.TemplateResponse(
         "partials/patient_roster_table.html",
         {
             "request": request,
             "settings": settings,
-            "patients": patients
+            "active_patient_icn": active_icn,
+            **roster
         }
     )
+
+
+def _export_response(fmt: str, parts: list, compress: bool, base_name: str) -> StreamingResponse:
+    """Wrap a patient_export_service stream as a file download."""
+    filename = patient_export_service.export_filename(base_name, fmt, compress)
+    return StreamingResponse(
+        patient_export_service.stream_export(fmt, parts, compress=compress),
+        media_type="application/gzip" if compress else patient_export_service.EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/export")
+async def export_roster(
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name),
+    file_format: str = Query("csv", alias="format"),
+    columns: Optional[str] = None,
+    gzip: bool = False,
+    name: Optional[str] = None,
+    icn: Optional[str] = None,
+    ssn_last4: Optional[str] = None,
+    station: Optional[str] = None
+):
+    """
+    Export the patient roster (same filters as the roster table) as CSV or
+    NDJSON, streamed from a server-side cursor.
+
+    Query params:
+        format: csv (default) or ndjson
+        columns: comma-separated demographics columns (default: roster columns)
+        gzip: compress the download on the fly
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return HTMLResponse('<div class="error-msg"><strong>Error:</strong> Authentication required</div>', status_code=401)
+
+    if file_format not in patient_export_service.EXPORT_FORMATS:
+        return HTMLResponse('<div class="error-msg">Format must be csv or ndjson</div>', status_code=400)
+
+    try:
+        parts = patient_export_service.roster_parts(columns, name, icn, ssn_last4, station)
+    except ValueError as e:
+        return HTMLResponse(f'<div class="error-msg">{html.escape(str(e))}</div>', status_code=400)
+
+    logger.info(f"Roster export ({file_format}) by user {user_info['user_id']}")
+    await audit_log.log("patient_export", user=user_info)
+    return _export_response(file_format, parts, gzip, "patients")
+
+
+@router.get("/{icn}/export")
+async def export_patient_chart(
+    icn: str,
+    db: AsyncSession = Depends(get_read_db),
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name),
+    section: str = "all",
+    file_format: str = Query("ndjson", alias="format"),
+    columns: Optional[str] = None,
+    gzip: bool = False
+):
+    """
+    Export a patient's chart, streamed from server-side cursors.
+
+    Query params:
+        section: all (default, NDJSON only), demographics, vitals, allergies,
+                 medications or notes
+        format: ndjson (default) or csv (single section)
+        columns: comma-separated columns (single section only)
+        gzip: compress the download on the fly
+    """
+    # Validate session
+    user_info = await validate_session(db, session_id) if session_id else None
+    if not user_info:
+        return HTMLResponse('<div class="error-msg"><strong>Error:</strong> Authentication required</div>', status_code=401)
+
+    if file_format not in patient_export_service.EXPORT_FORMATS:
+        return HTMLResponse('<div class="error-msg">Format must be csv or ndjson</div>', status_code=400)
+
+    if section == "all":
+        if file_format == "csv":
+            return HTMLResponse('<div class="error-msg">CSV exports one section at a time</div>', status_code=400)
+        sections = patient_export_service.CHART_SECTIONS
+    elif section in patient_export_service.EXPORT_DATASETS:
+        sections = [section]
+    else:
+        return HTMLResponse('<div class="error-msg">Unknown section</div>', status_code=400)
+
+    patient = await patient_crud_service.get_patient_by_icn(db, icn)
+    if not patient:
+        return HTMLResponse('<div class="error-msg">Patient not found</div>', status_code=404)
+
+    try:
+        parts = patient_export_service.chart_parts(icn, patient["patient_key"], sections, columns)
+    except ValueError as e:
+        return HTMLResponse(f'<div class="error-msg">{html.escape(str(e))}</div>', status_code=400)
+
+    logger.info(f"Chart export {icn} ({section}, {file_format}) by user {user_info['user_id']}")
+    await audit_log.log("patient_export", user=user_info, patient_icn=icn)
+    suffix = "chart" if section == "all" else section
+    return _export_response(file_format, parts, gzip, f"{icn}-{suffix}")
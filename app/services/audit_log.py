@@ -0,0 +1,326 @@
+# -----------------------------------------------------------
+# app/services/audit_log.py
+# -----------------------------------------------------------
+# Asynchronous audit pipeline: bounded in-memory queue drained
+# by a background task into auth.audit_logs in batches
+# -----------------------------------------------------------
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DataError, IntegrityError
+
+from database import engine
+from app.models.auth import AuditLog
+from app.services.metrics import registry
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+AUDIT_EVENTS = registry.counter(
+    "medz4_audit_events_total", "Audit events by outcome (written, dropped, rejected, failed_write).",
+    ("outcome",))
+AUDIT_BATCH_SECONDS = registry.histogram(
+    "medz4_audit_batch_write_seconds", "Time to insert one batch of audit rows.")
+
+# Columns this pipeline writes; patient_icn needs db/ddl/alter_audit_logs_add_patient_icn.sql
+AUDIT_COLUMNS = [
+    "user_id", "event_type", "event_timestamp", "email", "ip_address",
+    "user_agent", "success", "failure_reason", "session_id", "patient_icn",
+]
+
+# VARCHAR widths from the model; longer values (e.g. an oversized email on
+# the login form) are truncated so one event cannot fail a whole batch
+COLUMN_WIDTHS = {
+    column.name: column.type.length
+    for column in AuditLog.__table__.columns
+    if getattr(column.type, "length", None)
+}
+
+
+def _fit(column: str, value: Optional[str]) -> Optional[str]:
+    width = COLUMN_WIDTHS.get(column)
+    if value is None or width is None:
+        return value
+    value = str(value)
+    return value if len(value) <= width else value[:width]
+
+
+def _uuid(value: Any) -> Optional[uuid.UUID]:
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+class AuditPipeline:
+    """
+    Records audit events without touching the database on the request path.
+
+    log() stamps the event and puts it on a bounded queue; a background
+    task batches queued events (up to batch_size, waiting at most
+    linger_seconds for a batch to fill) into one multi-row INSERT.
+
+    Backpressure: when the queue is full, log() waits up to
+    enqueue_timeout_seconds for space, then drops the event (counted and
+    logged). A failed INSERT is retried with backoff, so the queue fills and
+    producers see backpressure instead of events being lost silently.
+    Rows the database rejects (DataError, IntegrityError) are never retried:
+    the batch is split until the offending rows are isolated, and only those
+    are dropped and logged. stop() drains everything still queued.
+    """
+
+    MAX_RETRY_BACKOFF_SECONDS = 30.0
+
+    def __init__(self, max_queue: int, batch_size: int, linger_seconds: float,
+                 enqueue_timeout_seconds: float, enabled: bool = True):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.enqueue_timeout_seconds = enqueue_timeout_seconds
+        self.enabled = enabled
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Optional[List[Dict[str, Any]]] = None  # Batch being written
+        self._columns: Optional[List[str]] = None  # AUDIT_COLUMNS present in the table
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.rejected = 0
+
+    # -------------------------------------------------------
+    # Producers (request path)
+    # -------------------------------------------------------
+
+    async def log(
+        self,
+        event_type: str,
+        *,
+        user: Optional[Dict[str, Any]] = None,
+        user_id: Any = None,
+        email: Optional[str] = None,
+        session_id: Any = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        success: bool = True,
+        failure_reason: Optional[str] = None,
+        patient_icn: Optional[str] = None,
+    ) -> None:
+        """
+        Queue one audit event. user is a validate_session() user_info dict
+        (fills user_id, email and session_id). Never raises.
+        """
+        if not self.enabled:
+            return
+
+        if user:
+            user_id = user_id or user.get("user_id")
+            email = email or user.get("email")
+            session_id = session_id or user.get("session_id")
+
+        event = {
+            "user_id": _uuid(user_id),
+            "event_type": _fit("event_type", event_type),
+            "event_timestamp": datetime.utcnow(),
+            "email": _fit("email", email),
+            "ip_address": _fit("ip_address", ip_address),
+            "user_agent": _fit("user_agent", user_agent),
+            "success": success,
+            "failure_reason": _fit("failure_reason", failure_reason),
+            "session_id": _uuid(session_id),
+            "patient_icn": _fit("patient_icn", patient_icn),
+        }
+
+        queue = self._get_queue()
+        try:
+            queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Backpressure: give the writer a moment to make room
+        try:
+            await asyncio.wait_for(queue.put(event), timeout=self.enqueue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            AUDIT_EVENTS.inc("dropped")
+            logger.error(f"Audit queue full ({self.max_queue}); dropped {event_type} event for {email or session_id}")
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    # -------------------------------------------------------
+    # Writer (background task)
+    # -------------------------------------------------------
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for one event, then gather more until batch_size or linger_seconds."""
+        queue = self._get_queue()
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.linger_seconds
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _get_columns(self, conn) -> List[str]:
+        """AUDIT_COLUMNS that exist in auth.audit_logs (patient_icn is added by a DDL script)."""
+        if self._columns is None:
+            result = await conn.execute(
+                text("""
+                    SELECT column_name FROM information_schema.columns
+                    WHERE table_schema = 'auth' AND table_name = 'audit_logs'
+                """)
+            )
+            present = {row[0] for row in result.fetchall()}
+            self._columns = [column for column in AUDIT_COLUMNS if column in present]
+            if "patient_icn" not in present:
+                logger.warning("auth.audit_logs has no patient_icn column; "
+                               "apply db/ddl/alter_audit_logs_add_patient_icn.sql to record patient ICNs")
+        return self._columns
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert one batch (a single multi-row INSERT) in its own transaction."""
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            columns = await self._get_columns(conn)
+            rows = [{column: event[column] for column in columns} for event in batch]
+            await conn.execute(insert(AuditLog.__table__), rows)
+        AUDIT_BATCH_SECONDS.observe(time.perf_counter() - started)
+
+        self.batches += 1
+        self.written += len(batch)
+        AUDIT_EVENTS.inc("written", amount=len(batch))
+
+    async def _write_with_retry(self, batch: List[Dict[str, Any]], retry: bool = True) -> None:
+        """
+        Write a batch, retrying connection/operational failures with backoff
+        (retry=False re-raises them). Rows rejected by the database are
+        isolated by splitting the batch and dropped one by one.
+        """
+        backoff = 1.0
+        while True:
+            try:
+                await self._write(batch)
+                return
+            except asyncio.CancelledError:
+                raise
+            except (DataError, IntegrityError) as e:
+                if len(batch) == 1:
+                    self._reject(batch[0], e)
+                    return
+                middle = len(batch) // 2
+                await self._write_with_retry(batch[:middle], retry)
+                await self._write_with_retry(batch[middle:], retry)
+                return
+            except Exception as e:
+                if not retry:
+                    raise
+                self.write_errors += 1
+                AUDIT_EVENTS.inc("failed_write", amount=len(batch))
+                self._columns = None  # Re-check the table on the next attempt
+                logger.error(f"Audit batch write failed ({len(batch)} events): {e} (retrying in {backoff:.0f}s)")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_RETRY_BACKOFF_SECONDS)
+
+    def _reject(self, event: Dict[str, Any], error: Exception) -> None:
+        """Drop one event the database will never accept (bad value, missing FK target)."""
+        self.rejected += 1
+        AUDIT_EVENTS.inc("rejected")
+        logger.error(f"Audit event rejected by the database, dropped: {event['event_type']} "
+                     f"for {event['email'] or event['session_id']} ({type(error).__name__}: {error.orig})")
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            self._in_flight = batch
+            await self._write_with_retry(batch)
+            self._in_flight = None
+
+    def start(self) -> None:
+        """Start the writer task (call from application startup)."""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._get_queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Audit pipeline started (queue {self.max_queue}, batch {self.batch_size})")
+
+    async def stop(self, timeout_seconds: float = 10.0) -> None:
+        """Stop the writer and drain queued events (one attempt each, bounded by timeout)."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # The interrupted batch was rolled back, so it is written again here
+        pending = list(self._in_flight or [])
+        self._in_flight = None
+        queue = self._get_queue()
+        while not queue.empty():
+            pending.append(queue.get_nowait())
+
+        drained = 0
+        try:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                await asyncio.wait_for(self._write_with_retry(batch, retry=False), timeout_seconds)
+                drained += len(batch)
+        except Exception as e:
+            lost = len(pending) - drained
+            self.dropped += lost
+            AUDIT_EVENTS.inc("dropped", amount=lost)
+            logger.error(f"Audit drain on shutdown failed, {lost} events lost: {e}")
+            return
+        logger.info(f"Audit pipeline stopped ({len(pending)} queued events drained)")
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and write counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "queued": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "rejected": self.rejected,
+        }
+
+
+# Singleton instance
+audit_log = AuditPipeline(
+    max_queue=settings.app.audit_queue_max,
+    batch_size=settings.app.audit_batch_size,
+    linger_seconds=settings.app.audit_linger_seconds,
+    enqueue_timeout_seconds=settings.app.audit_enqueue_timeout_seconds,
+    enabled=settings.app.audit_enabled,
+)
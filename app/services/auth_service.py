@@ -4,7 +4,6 @@
 # Authentication service functions
 # -----------------------------------------------------------
 
-import bcrypt
 import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
@@ -12,47 +11,67 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 import logging
 
-from app.models.auth import User, Session as SessionModel, AuditLog
+from database import AsyncSessionLocal
+from app.models.auth import User, Session as SessionModel
+from app.services.session_cache import session_cache
+from app.services.session_activity import activity_tracker
+from app.services.invalidation_bus import invalidation_bus
+from app.services.password_verifier import password_verifier
+from app.services.audit_log import audit_log
 from config import settings
 
 logger = logging.getLogger(__name__)
 
 
-def verify_password(plain_password: str, password_hash: str) -> bool:
-    """Verify a plain password against a bcrypt hash."""
-    try:
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'),
-            password_hash.encode('utf-8')
-        )
-    except Exception as e:
-        logger.error(f"Password verification error: {e}")
-        return False
+async def verify_password(plain_password: str, password_hash: str) -> bool:
+    """
+    Verify a plain password against a bcrypt hash on the password worker
+    pool (bcrypt would otherwise block the event loop for every request).
+    Raises LoginBusy if too many logins are already waiting.
+    """
+    return await password_verifier.verify(plain_password, password_hash)
 
 
-async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+async def authenticate_user(
+    db: AsyncSession,
+    email: str,
+    password: str,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> Optional[User]:
     """
     Authenticate user by email and password.
     Returns User object if authentication succeeds, None otherwise.
+    Failures are audited as login_failed with the reason.
+    Raises LoginBusy (nothing recorded) when password verification is saturated.
     """
+    async def audit_failure(reason: str, user_id: Any = None) -> None:
+        await audit_log.log(
+            "login_failed", user_id=user_id, email=email, ip_address=ip_address,
+            user_agent=user_agent, success=False, failure_reason=reason
+        )
+
     # Query user by email
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
 
     if not user:
         logger.warning(f"Authentication failed: user not found - {email}")
+        await audit_failure("user not found")
         return None
 
     if user.is_locked:
         logger.warning(f"Authentication failed: account locked - {email}")
+        await audit_failure("account locked", user.user_id)
         return None
 
     if not user.is_active:
         logger.warning(f"Authentication failed: user inactive - {email}")
+        await audit_failure("user inactive", user.user_id)
         return None
 
     # Verify password
-    if not verify_password(password, user.password_hash):
+    if not await verify_password(password, user.password_hash):
         logger.warning(f"Authentication failed: invalid password - {email}")
         # Increment failed login attempts
         user.failed_login_attempts += 1
@@ -60,6 +79,7 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> Opti
             user.is_locked = True
             logger.warning(f"Account locked after 5 failed attempts: {email}")
         await db.commit()
+        await audit_failure("invalid password" + (" (account locked)" if user.is_locked else ""), user.user_id)
         return None
 
     # Reset failed login attempts on successful login
@@ -99,21 +119,16 @@ async def create_session(
     )
 
     db.add(session)
+    await db.commit()
 
-    # Log successful login
-    audit_log = AuditLog(
-        user_id=user.user_id,
-        event_type="login",
-        event_timestamp=datetime.utcnow(),
-        email=user.email,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        success=True,
-        session_id=session_id,
+    # Audited off the request path (no longer part of the login transaction)
+    await audit_log.log(
+        "login", user_id=user.user_id, email=user.email, session_id=session_id,
+        ip_address=ip_address, user_agent=user_agent
     )
-    db.add(audit_log)
 
-    await db.commit()
+    # The new session row may not be on the read replicas yet
+    await invalidation_bus.note_session_write(str(session_id))
 
     logger.info(f"Session created for user {user.email}: {session_id}")
 
@@ -130,6 +145,10 @@ async def validate_session(db: AsyncSession, session_id: str) -> Optional[Dict[s
     """
     Validate session by ID.
     Returns user info if valid, None if invalid/expired.
+
+    Recently validated sessions are served from the in-process session
+    cache without touching the database. last_activity_at is recorded by
+    the write-behind activity tracker rather than updated per request.
     """
     try:
         session_uuid = uuid.UUID(session_id)
@@ -137,6 +156,11 @@ async def validate_session(db: AsyncSession, session_id: str) -> Optional[Dict[s
         logger.warning(f"Invalid session ID format: {session_id}")
         return None
 
+    cached = session_cache.get(str(session_uuid))
+    if cached is not None:
+        activity_tracker.touch(session_uuid)
+        return cached
+
     # Query session with user data
     result = await db.execute(
         select(SessionModel, User)
@@ -159,7 +183,9 @@ async def validate_session(db: AsyncSession, session_id: str) -> Optional[Dict[s
     # Check if session expired
     if session.expires_at < datetime.utcnow():
         logger.warning(f"Session expired: {session_id}")
-        await invalidate_session(db, session_id)
+        # Own primary session: the caller's may be read-only (get_read_db)
+        async with AsyncSessionLocal() as write_db:
+            await invalidate_session(write_db, session_id, event_type="session_expired")
         return None
 
     # Check if user is active
@@ -167,38 +193,54 @@ async def validate_session(db: AsyncSession, session_id: str) -> Optional[Dict[s
         logger.warning(f"User inactive: {user.email}")
         return None
 
-    # Update last activity timestamp
-    await db.execute(
-        update(SessionModel)
-        .where(SessionModel.session_id == session_uuid)
-        .values(last_activity_at=datetime.utcnow())
-    )
-    await db.commit()
+    # Record activity; flushed to auth.sessions in bulk by the tracker
+    activity_tracker.touch(session_uuid)
 
-    return {
+    user_info = {
         "session_id": str(session.session_id),
         "user_id": str(user.user_id),
         "email": user.email,
         "display_name": user.display_name,
         "role": "user",  # Default role since column doesn't exist in database
     }
+    session_cache.put(str(session_uuid), user_info, session.expires_at)
+
+    return user_info
 
 
-async def invalidate_session(db: AsyncSession, session_id: str) -> bool:
-    """Invalidate a session by marking it inactive."""
+async def invalidate_session(
+    db: AsyncSession,
+    session_id: str,
+    event_type: str = "logout",
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> bool:
+    """Invalidate a session by marking it inactive (audited as event_type)."""
     try:
         session_uuid = uuid.UUID(session_id)
     except (ValueError, AttributeError):
         return False
 
+    # Evict first so no request is served from cache after logout
+    session_cache.evict(str(session_uuid))
+
     result = await db.execute(
         update(SessionModel)
         .where(SessionModel.session_id == session_uuid)
         .values(is_active=False)
+        .returning(SessionModel.user_id)
     )
+    user_id = result.scalar_one_or_none()
     await db.commit()
 
-    if result.rowcount > 0:
+    # Other workers may have the session cached too
+    await invalidation_bus.invalidate_sessions([str(session_uuid)])
+
+    if user_id is not None:
+        await audit_log.log(
+            event_type, user_id=user_id, session_id=session_uuid,
+            ip_address=ip_address, user_agent=user_agent
+        )
         logger.info(f"Session invalidated: {session_id}")
         return True
 
@@ -0,0 +1,180 @@
+# -----------------------------------------------------------
+# app/services/ccow_broker.py
+# -----------------------------------------------------------
+# Per-user CCOW context watcher with fan-out to open tabs
+# -----------------------------------------------------------
+
+import asyncio
+import logging
+from typing import Optional, Dict, Any
+
+from database import AsyncSessionLocal
+from app.services.ccow_service import ccow_service
+from app.services.demographics_cache import demographics_cache
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _UserChannel:
+    """Subscribers and watcher state for one user."""
+
+    def __init__(self):
+        self.subscribers: Dict[asyncio.Queue, str] = {}  # queue -> session_id
+        self.current: Optional[Dict[str, Any]] = None    # last published context
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class CCOWContextBroker:
+    """
+    Pushes CCOW context changes to every open tab of a user.
+
+    One background watcher runs per user (not per tab) while that user has
+    at least one subscriber. The watcher asks CCOW Vault for the user's
+    active patient, resolves the patient name only when the context changes,
+    and publishes the new context to every subscriber queue.
+
+    CCOW Vault has no push API, so the watcher itself polls the vault every
+    CCOW_WATCH_INTERVAL_SECONDS; poke() wakes it immediately after this app
+    changes the context.
+    """
+
+    QUEUE_SIZE = 4
+
+    def __init__(self, watch_interval_seconds: float):
+        self.watch_interval_seconds = watch_interval_seconds
+        self._channels: Dict[str, _UserChannel] = {}
+
+    def subscribe(self, user_id: str, session_id: str) -> asyncio.Queue:
+        """
+        Register a tab for context updates.
+        The queue receives context dicts (patient_id, patient_name, set_by),
+        or None when the broker shuts down.
+        """
+        channel = self._channels.get(user_id)
+        if channel is None:
+            channel = self._channels[user_id] = _UserChannel()
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        channel.subscribers[queue] = session_id
+
+        if channel.current is not None:
+            # Late joiner: send the last known context right away
+            queue.put_nowait(channel.current)
+
+        if channel.task is None or channel.task.done():
+            channel.task = asyncio.create_task(self._watch(user_id, channel))
+            logger.debug(f"CCOW watcher started for user {user_id}")
+
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        """Remove a tab; stops the user's watcher when no tabs remain."""
+        channel = self._channels.get(user_id)
+        if channel is None:
+            return
+
+        channel.subscribers.pop(queue, None)
+
+        if not channel.subscribers:
+            if channel.task is not None:
+                channel.task.cancel()
+            self._channels.pop(user_id, None)
+            logger.debug(f"CCOW watcher stopped for user {user_id}")
+
+    def poke(self, user_id: str) -> None:
+        """Wake a user's watcher now (after this app sets or clears context)."""
+        channel = self._channels.get(user_id)
+        if channel is not None:
+            channel.wake.set()
+
+    async def close(self) -> None:
+        """Stop all watchers and release all subscribers (application shutdown)."""
+        channels = list(self._channels.values())
+        self._channels.clear()
+
+        for channel in channels:
+            if channel.task is not None:
+                channel.task.cancel()
+            for queue in channel.subscribers:
+                self._publish(queue, None)
+
+        await asyncio.gather(
+            *(c.task for c in channels if c.task is not None),
+            return_exceptions=True
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return watcher/subscriber counts for monitoring."""
+        return {
+            "watchers": len(self._channels),
+            "subscribers": sum(len(c.subscribers) for c in self._channels.values()),
+        }
+
+    # -------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------
+
+    async def _watch(self, user_id: str, channel: _UserChannel) -> None:
+        """Watcher loop for one user; publishes only when the context changes."""
+        last_key: Any = object()  # Sentinel so the first lookup always publishes
+
+        while channel.subscribers:
+            # Any live session of this user sees the same per-user context
+            session_id = next(reversed(channel.subscribers.values()))
+
+            try:
+                ccow_context = await ccow_service.get_active_patient(session_id)
+                patient_id = ccow_context.get("patient_id") if ccow_context else None
+                key = (patient_id, ccow_context.get("set_by") if ccow_context else None)
+
+                if key != last_key:
+                    last_key = key
+                    channel.current = await self._build_context(ccow_context)
+                    for queue in list(channel.subscribers):
+                        self._publish(queue, channel.current)
+            except Exception as e:
+                logger.error(f"CCOW watcher error for user {user_id}: {e}")
+
+            try:
+                await asyncio.wait_for(channel.wake.wait(), timeout=self.watch_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            channel.wake.clear()
+
+    async def _build_context(self, ccow_context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Resolve the display name for a CCOW context (once per change)."""
+        if not ccow_context or not ccow_context.get("patient_id"):
+            return {"patient_id": None, "patient_name": None, "set_by": None}
+
+        patient_icn = ccow_context["patient_id"]
+
+        # The session only opens a connection on a cache miss
+        async with AsyncSessionLocal() as db:
+            patient_name = await demographics_cache.get_name(db, patient_icn)
+
+        return {
+            "patient_id": patient_icn,
+            "patient_name": patient_name,
+            "set_by": ccow_context.get("set_by", "unknown"),
+        }
+
+    @staticmethod
+    def _publish(queue: asyncio.Queue, context: Optional[Dict[str, Any]]) -> None:
+        """Put without blocking; a slow tab only needs the latest context."""
+        while True:
+            try:
+                queue.put_nowait(context)
+                return
+            except asyncio.QueueFull:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+
+
+# Singleton instance
+ccow_broker = CCOWContextBroker(
+    watch_interval_seconds=settings.ccow.watch_interval_seconds,
+)
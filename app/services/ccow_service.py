@@ -4,10 +4,15 @@
 # CCOW Vault v2.1 API integration service
 # -----------------------------------------------------------
 
+import asyncio
 import httpx
 import logging
-from typing import Optional, Dict, Any
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 
+from app.services.metrics import CCOW_CALLS, CCOW_LOOKUPS
+from app.services.audit_log import audit_log
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -20,15 +25,79 @@ class CCOWService:
     Uses X-Session-ID header for authentication (cross-application pattern).
     CCOW Vault validates the session against the shared auth.sessions table
     and extracts user_id to provide per-user context isolation.
+
+    All calls share one long-lived, keep-alive httpx.AsyncClient that is
+    opened and closed by the FastAPI lifespan (start/close).
+
+    get_active_patient is single-flight per session: concurrent lookups for
+    the same session share one in-flight request, and the result is reused
+    for CCOW_LOOKUP_TTL_SECONDS. set/clear drop the cached result.
     """
 
+    # Bound on cached results and per-session metrics
+    MAX_TRACKED_SESSIONS = 1024
+
+    # _count_lookup outcome -> medz4_ccow_active_patient_lookups_total result label
+    LOOKUP_RESULTS = {"hits": "hit", "coalesced": "coalesced", "misses": "miss"}
+
     def __init__(self):
         self.base_url = settings.ccow.base_url
-        self.timeout = 5.0  # 5 second timeout for CCOW calls
+        self.timeout = settings.ccow.timeout_seconds
+        self.lookup_ttl = settings.ccow.lookup_ttl_seconds
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._results: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lookup_stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the pooled client from CCOW_* settings."""
+        http2 = settings.ccow.http2
+        if http2:
+            try:
+                import h2  # noqa: F401  (optional dependency for HTTP/2)
+            except ImportError:
+                logger.warning("CCOW_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+                http2 = False
+
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.ccow.max_connections,
+                max_keepalive_connections=settings.ccow.max_keepalive_connections,
+                keepalive_expiry=settings.ccow.keepalive_expiry_seconds,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Shared HTTP client for CCOW Vault.
+        Created lazily if start() has not been called (e.g., scripts).
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self) -> None:
+        """Open the shared client (called from application startup)."""
+        self.client
+        logger.info(
+            f"CCOW client started (max_connections={settings.ccow.max_connections}, "
+            f"max_keepalive={settings.ccow.max_keepalive_connections})"
+        )
+
+    async def close(self) -> None:
+        """Close the shared client and its connection pool (called on shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("CCOW client closed")
 
     async def get_active_patient(self, session_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the current user's active patient context from CCOW Vault.
+        Concurrent calls for the same session are coalesced into one request.
 
         Args:
             session_id: med-z4 session UUID (from med_z4_session_id cookie)
@@ -37,30 +106,109 @@ class CCOWService:
             Patient context dict with patient_id, set_by, set_at, etc.
             None if no active patient or on error.
         """
+        cached = self._results.get(session_id)
+        if cached is not None and cached[0] > time.monotonic():
+            self._count_lookup(session_id, "hits")
+            return cached[1]
+
+        task = self._inflight.get(session_id)
+        if task is not None:
+            self._count_lookup(session_id, "coalesced")
+        else:
+            self._count_lookup(session_id, "misses")
+            task = asyncio.ensure_future(self._fetch_active_patient(session_id))
+            self._inflight[session_id] = task
+            task.add_done_callback(lambda t: self._complete_lookup(session_id, t))
+
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(task)
+
+    def _complete_lookup(self, session_id: str, task: asyncio.Task) -> None:
+        """Done-callback: clear the in-flight entry and cache the result."""
+        # A lookup detached by _invalidate_lookup must not repopulate the cache
+        if self._inflight.get(session_id) is not task:
+            return
+        self._inflight.pop(session_id, None)
+
+        if task.cancelled() or task.exception() is not None or self.lookup_ttl <= 0:
+            return
+
+        self._results[session_id] = (time.monotonic() + self.lookup_ttl, task.result())
+        self._results.move_to_end(session_id)
+        while len(self._results) > self.MAX_TRACKED_SESSIONS:
+            self._results.popitem(last=False)
+
+    def _invalidate_lookup(self, session_id: str) -> None:
+        """Drop cached and in-flight lookups after this app changes the context."""
+        self._results.pop(session_id, None)
+        self._inflight.pop(session_id, None)
+
+    def _count_lookup(self, session_id: str, outcome: str) -> None:
+        """Record a lookup outcome (hits, coalesced, misses) for a session."""
+        stats = self._lookup_stats.get(session_id)
+        if stats is None:
+            stats = self._lookup_stats[session_id] = {"hits": 0, "coalesced": 0, "misses": 0}
+        self._lookup_stats.move_to_end(session_id)
+        stats[outcome] += 1
+        CCOW_LOOKUPS.inc(self.LOOKUP_RESULTS[outcome])
+
+        while len(self._lookup_stats) > self.MAX_TRACKED_SESSIONS:
+            self._lookup_stats.popitem(last=False)
+
+    def lookup_stats(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return single-flight metrics: totals across all sessions, plus the
+        per-session counters of session_id only (truncated for display).
+        Other users' sessions are never listed.
+        """
+        totals = {"hits": 0, "coalesced": 0, "misses": 0}
+        for stats in self._lookup_stats.values():
+            for outcome, count in stats.items():
+                totals[outcome] += count
+
+        sessions = {}
+        own = self._lookup_stats.get(session_id) if session_id else None
+        if own is not None:
+            sessions[session_id[:8] + "..."] = dict(own)
+
+        return {
+            "ttl_seconds": self.lookup_ttl,
+            "in_flight": len(self._inflight),
+            "cached": len(self._results),
+            "totals": totals,
+            "sessions": sessions,
+        }
+
+    async def _fetch_active_patient(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Single GET /ccow/active-patient (use get_active_patient instead)."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/ccow/active-patient",
-                    headers={"X-Session-ID": session_id}
-                )
+            response = await self.client.get(
+                f"{self.base_url}/ccow/active-patient",
+                headers={"X-Session-ID": session_id}
+            )
 
-                if response.status_code == 404:
-                    # No active patient for this user
-                    return None
+            if response.status_code == 404:
+                # No active patient for this user
+                CCOW_CALLS.inc("get", "not_found")
+                return None
 
-                response.raise_for_status()
-                data = response.json()
+            response.raise_for_status()
+            data = response.json()
 
-                logger.debug(f"CCOW get_active_patient: {data.get('patient_id')}")
-                return data
+            CCOW_CALLS.inc("get", "success")
+            logger.debug(f"CCOW get_active_patient: {data.get('patient_id')}")
+            return data
 
         except httpx.TimeoutException:
+            CCOW_CALLS.inc("get", "timeout")
             logger.warning("CCOW get_active_patient timeout")
             return None
         except httpx.HTTPStatusError as e:
+            CCOW_CALLS.inc("get", "http_error")
             logger.warning(f"CCOW get_active_patient failed: {e.response.status_code}")
             return None
         except Exception as e:
+            CCOW_CALLS.inc("get", "error")
             logger.error(f"CCOW get_active_patient error: {e}")
             return None
 
@@ -76,27 +224,32 @@ class CCOWService:
             True if successful, False otherwise
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.put(
-                    f"{self.base_url}/ccow/active-patient",
-                    headers={"X-Session-ID": session_id},
-                    json={
-                        "patient_id": patient_icn,
-                        "set_by": "med-z4"
-                    }
-                )
-                response.raise_for_status()
-
-                logger.info(f"CCOW set_active_patient: {patient_icn}")
-                return True
+            response = await self.client.put(
+                f"{self.base_url}/ccow/active-patient",
+                headers={"X-Session-ID": session_id},
+                json={
+                    "patient_id": patient_icn,
+                    "set_by": "med-z4"
+                }
+            )
+            response.raise_for_status()
+            self._invalidate_lookup(session_id)
+
+            CCOW_CALLS.inc("set", "success")
+            await audit_log.log("ccow_set", session_id=session_id, patient_icn=patient_icn)
+            logger.info(f"CCOW set_active_patient: {patient_icn}")
+            return True
 
         except httpx.TimeoutException:
+            CCOW_CALLS.inc("set", "timeout")
             logger.error("CCOW set_active_patient timeout")
             return False
         except httpx.HTTPStatusError as e:
+            CCOW_CALLS.inc("set", "http_error")
             logger.error(f"CCOW set_active_patient failed: {e.response.status_code}")
             return False
         except Exception as e:
+            CCOW_CALLS.inc("set", "error")
             logger.error(f"CCOW set_active_patient error: {e}")
             return False
 
@@ -111,21 +264,35 @@ class CCOWService:
             True if successful or no context to clear, False on error
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.delete(
-                    f"{self.base_url}/ccow/active-patient",
-                    headers={"X-Session-ID": session_id}
-                )
-
-                if response.status_code in (204, 404):
-                    # 204 = cleared, 404 = nothing to clear
-                    logger.info("CCOW clear_active_patient: success")
-                    return True
-
-                response.raise_for_status()
+            response = await self.client.delete(
+                f"{self.base_url}/ccow/active-patient",
+                headers={"X-Session-ID": session_id}
+            )
+            self._invalidate_lookup(session_id)
+
+            if response.status_code in (204, 404):
+                # 204 = cleared, 404 = nothing to clear
+                CCOW_CALLS.inc("clear", "success" if response.status_code == 204 else "not_found")
+                if response.status_code == 204:
+                    await audit_log.log("ccow_clear", session_id=session_id)
+                logger.info("CCOW clear_active_patient: success")
                 return True
 
+            response.raise_for_status()
+            CCOW_CALLS.inc("clear", "success")
+            await audit_log.log("ccow_clear", session_id=session_id)
+            return True
+
+        except httpx.TimeoutException:
+            CCOW_CALLS.inc("clear", "timeout")
+            logger.error("CCOW clear_active_patient timeout")
+            return False
+        except httpx.HTTPStatusError as e:
+            CCOW_CALLS.inc("clear", "http_error")
+            logger.error(f"CCOW clear_active_patient failed: {e.response.status_code}")
+            return False
         except Exception as e:
+            CCOW_CALLS.inc("clear", "error")
             logger.error(f"CCOW clear_active_patient error: {e}")
             return False
 
@@ -137,16 +304,18 @@ class CCOWService:
             Health check response dict or error dict
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}{settings.ccow.health_endpoint}"
-                )
-                if response.status_code == 200:
-                    return response.json()
-                return {"status": "unhealthy", "error": f"HTTP {response.status_code}"}
+            response = await self.client.get(
+                f"{self.base_url}{settings.ccow.health_endpoint}"
+            )
+            if response.status_code == 200:
+                CCOW_CALLS.inc("health", "success")
+                return response.json()
+            CCOW_CALLS.inc("health", "http_error")
+            return {"status": "unhealthy", "error": f"HTTP {response.status_code}"}
         except Exception as e:
+            CCOW_CALLS.inc("health", "timeout" if isinstance(e, httpx.TimeoutException) else "error")
             return {"status": "unreachable", "error": str(e)}
 
 
 # Singleton instance
-ccow_service = CCOWService()
\ No newline at end of file
+ccow_service = CCOWService()
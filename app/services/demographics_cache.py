@@ -0,0 +1,158 @@
+# -----------------------------------------------------------
+# app/services/demographics_cache.py
+# -----------------------------------------------------------
+# In-process read-through cache of patient demographics rows
+# (bounded TTL/LRU, keyed by ICN)
+# -----------------------------------------------------------
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DemographicsCache:
+    """
+    Bounded TTL/LRU cache of clinical.patient_demographics rows, keyed by ICN.
+
+    load() is read-through: a miss runs one primary-key SELECT and caches
+    the full row (or the fact that the ICN does not exist), so repeated
+    name lookups from the CCOW banner, poll and select paths never reach
+    Postgres. Patient create/update/delete call invalidate(); the TTL is a
+    backstop for writes made outside this process (ETL reloads).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, settle_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # After a write, rows read through a (possibly lagging) replica are
+        # not cached for this long, so a stale copy cannot outlive the lag
+        self.settle_seconds = settle_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._settling: Dict[str, float] = {}  # icn -> monotonic deadline
+        self._generation = 0  # Bumped on every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def peek(self, icn: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Return (found, row) without touching the database.
+        row is None for a cached "patient does not exist".
+        """
+        entry = self._entries.get(icn)
+
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        if entry["cached_until"] < time.monotonic():
+            self._entries.pop(icn, None)
+            self.evictions += 1
+            self.misses += 1
+            return False, None
+
+        # Mark as most recently used
+        self._entries.move_to_end(icn)
+        self.hits += 1
+        return True, entry["row"]
+
+    def put(self, icn: str, row: Optional[Dict[str, Any]]) -> None:
+        """Cache a demographics row (None records a missing patient)."""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        self._entries[icn] = {
+            "row": row,
+            "cached_until": time.monotonic() + self.ttl_seconds,
+        }
+        self._entries.move_to_end(icn)
+
+        # Evict least recently used entries beyond capacity
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def load(self, db: AsyncSession, icn: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the demographics row for an ICN (copy), reading through to
+        Postgres on a miss. Returns None if the patient does not exist.
+        """
+        found, row = self.peek(icn)
+        if not found:
+            generation = self._generation
+            result = await db.execute(
+                text("SELECT * FROM clinical.patient_demographics WHERE icn = :icn"),
+                {"icn": icn}
+            )
+            db_row = result.fetchone()
+            row = dict(db_row._mapping) if db_row else None
+
+            # Skip caching if the patient was invalidated while we were reading
+            # (or so recently that the read may have hit a lagging replica)
+            if generation == self._generation and not self._is_settling(icn):
+                self.put(icn, row)
+
+        return dict(row) if row is not None else None
+
+    async def get_name(self, db: AsyncSession, icn: str) -> Optional[str]:
+        """Return name_display for an ICN (None if the patient does not exist)."""
+        row = await self.load(db, icn)
+        return row["name_display"] if row else None
+
+    def _is_settling(self, icn: str) -> bool:
+        deadline = self._settling.get(icn)
+        if deadline is None:
+            return False
+        if deadline < time.monotonic():
+            self._settling.pop(icn, None)
+            return False
+        return True
+
+    def invalidate(self, icns: Iterable[str]) -> None:
+        """Drop cached rows after patient writes (create, update, delete)."""
+        self._generation += 1
+        now = time.monotonic()
+        for icn in icns:
+            if self._entries.pop(icn, None) is not None:
+                self.evictions += 1
+                logger.debug(f"Demographics cache evicted: {icn}")
+            if self.settle_seconds > 0:
+                self._settling[icn] = now + self.settle_seconds
+
+        if len(self._settling) > self.max_entries:
+            self._settling = {key: deadline for key, deadline in self._settling.items() if deadline > now}
+
+    def clear(self) -> None:
+        """Remove all cached rows."""
+        self._generation += 1
+        self.evictions += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+demographics_cache = DemographicsCache(
+    max_entries=settings.app.demographics_cache_max_entries,
+    ttl_seconds=settings.app.demographics_cache_ttl_seconds,
+    settle_seconds=settings.replica.max_lag_seconds if settings.replica.enabled else 0.0,
+)
@@ -0,0 +1,234 @@
+# -----------------------------------------------------------
+# app/services/invalidation_bus.py
+# -----------------------------------------------------------
+# Cross-worker cache invalidation over Postgres LISTEN/NOTIFY
+# -----------------------------------------------------------
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Optional, Dict, Any, Iterable, List
+
+import asyncpg
+from sqlalchemy import text
+
+from database import engine, replica_router
+from app.services.session_cache import session_cache
+from app.services.demographics_cache import demographics_cache
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """
+    Keeps the in-process caches of every med-z4 worker coherent.
+
+    Writers call invalidate_patients / invalidate_sessions / flush_all: the
+    local caches are evicted immediately and a NOTIFY is published on
+    POSTGRES_INVALIDATION_CHANNEL. Each worker holds one dedicated asyncpg
+    connection that LISTENs on the channel and evicts on receipt (its own
+    messages are skipped).
+
+    The listener reconnects with exponential backoff. Notifications sent
+    while a worker was disconnected are lost, so every (re)connect starts
+    with a full local flush.
+    """
+
+    # Keys per NOTIFY (payloads must stay under Postgres' 8000-byte limit)
+    KEYS_PER_MESSAGE = 200
+    # Above this many keys, one flush message is cheaper than many key messages
+    MAX_KEYS = 2000
+    # Idle listener connection liveness check
+    PING_INTERVAL_SECONDS = 30.0
+
+    def __init__(self, channel: str, max_backoff_seconds: float, enabled: bool = True):
+        self.channel = channel
+        self.max_backoff_seconds = max_backoff_seconds
+        self.enabled = enabled
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # One query at a time on the listener connection
+        self._stats = {"published": 0, "received": 0, "publish_errors": 0, "reconnects": 0}
+
+    # -------------------------------------------------------
+    # Publishing
+    # -------------------------------------------------------
+
+    async def invalidate_patients(self, icns: Iterable[str]) -> None:
+        """Evict patients (by ICN) here and in every other worker."""
+        icns = list(icns)
+        demographics_cache.invalidate(icns)
+        await self._publish("icn", icns)
+
+    async def invalidate_sessions(self, session_ids: Iterable[str]) -> None:
+        """Evict sessions (by session UUID string) here and in every other worker."""
+        session_ids = list(session_ids)
+        for session_id in session_ids:
+            session_cache.evict(session_id)
+        await self._publish("session", session_ids)
+
+    async def note_session_write(self, session_id: Optional[str]) -> None:
+        """
+        Record that a session just wrote, so every worker routes its reads to
+        the primary for POSTGRES_REPLICA_READ_YOUR_WRITES_SECONDS. No-op
+        without read replicas.
+        """
+        if not session_id or not replica_router.enabled:
+            return
+        replica_router.mark_write(session_id)
+        await self._publish("write", [session_id])
+
+    async def flush_all(self) -> None:
+        """Clear every cache here and in every other worker (e.g., after an ETL reload)."""
+        self._flush_local()
+        await self._publish("flush", [])
+
+    async def _publish(self, kind: str, keys: List[str]) -> None:
+        """Send NOTIFY messages; failures are logged, never raised to the writer."""
+        if not self.enabled:
+            return
+
+        if len(keys) > self.MAX_KEYS:
+            kind, keys = "flush", []
+
+        if kind == "flush":
+            batches = [[]]
+        else:
+            batches = [keys[i:i + self.KEYS_PER_MESSAGE] for i in range(0, len(keys), self.KEYS_PER_MESSAGE)]
+
+        try:
+            for batch in batches:
+                payload = json.dumps({"origin": self.origin, "kind": kind, "keys": batch})
+                connection = self._connection
+                if connection is not None and not connection.is_closed():
+                    # Reuse the idle LISTEN connection (no pool checkout)
+                    async with self._lock:
+                        await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                else:
+                    async with engine.begin() as conn:
+                        await conn.execute(
+                            text("SELECT pg_notify(:channel, :payload)"),
+                            {"channel": self.channel, "payload": payload}
+                        )
+                self._stats["published"] += 1
+        except Exception as e:
+            self._stats["publish_errors"] += 1
+            logger.error(f"Cache invalidation publish failed ({kind}): {e}")
+
+    # -------------------------------------------------------
+    # Listening
+    # -------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start the listener task (called from application startup)."""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        """Stop the listener and close its connection (called on shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen_forever(self) -> None:
+        """Connect, LISTEN until the connection drops, then reconnect with backoff."""
+        backoff = 1.0
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(settings.postgres.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _conn: lost.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                self._connection = connection
+
+                # Anything published while we were not listening is unknown
+                self._flush_local()
+                logger.info(f"Cache invalidation listener connected (channel={self.channel})")
+                backoff = 1.0
+
+                # Ping periodically: a silently dropped TCP connection never
+                # fires the termination listener
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=self.PING_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        async with self._lock:
+                            await connection.fetchval("SELECT 1", timeout=5)
+                logger.warning("Cache invalidation listener connection lost")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error: {e} (retrying in {backoff:.0f}s)")
+            finally:
+                self._connection = None
+                if connection is not None and not connection.is_closed():
+                    try:
+                        await connection.close(timeout=2)
+                    except Exception:
+                        connection.terminate()
+
+            self._stats["reconnects"] += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff_seconds)
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        """asyncpg listener callback: apply another worker's invalidation."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed cache invalidation message")
+            return
+
+        if message.get("origin") == self.origin:
+            return
+
+        self._stats["received"] += 1
+        kind = message.get("kind")
+        keys = message.get("keys") or []
+
+        if kind == "icn":
+            demographics_cache.invalidate(keys)
+        elif kind == "session":
+            for session_id in keys:
+                session_cache.evict(session_id)
+        elif kind == "write":
+            for session_id in keys:
+                replica_router.mark_write(session_id)
+        elif kind == "flush":
+            self._flush_local()
+        else:
+            logger.warning(f"Ignoring unknown cache invalidation kind: {kind}")
+
+    @staticmethod
+    def _flush_local() -> None:
+        session_cache.clear()
+        demographics_cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return listener state and message counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "connected": self._connection is not None and not self._connection.is_closed(),
+            "channel": self.channel,
+            **self._stats,
+        }
+
+
+# Singleton instance
+invalidation_bus = InvalidationBus(
+    channel=settings.postgres.invalidation_channel,
+    max_backoff_seconds=settings.postgres.invalidation_max_backoff_seconds,
+    enabled=settings.postgres.invalidation_enabled,
+)
@@ -0,0 +1,257 @@
+# -----------------------------------------------------------
+# app/services/metrics.py
+# -----------------------------------------------------------
+# In-process metrics registry (Prometheus text format) and the
+# ASGI middleware that records per-route request metrics
+# -----------------------------------------------------------
+
+import time
+import logging
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (HTTP requests and SQL statements)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter; labels are passed positionally in labelnames order."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g., requests in flight)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. observe() is one bisect plus three updates;
+    cumulative bucket counts are only computed at render time.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[float, int]]:
+        """Return {labels: (sum, count)} for in-app displays."""
+        return {labels: (series[1], series[2]) for labels, series in list(self._series.items())}
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {repr(float(total))}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds all metrics for this worker. Collectors are callables invoked at
+    scrape time that return extra exposition lines (e.g., cache stats), so
+    snapshot-style values cost nothing between scrapes.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        self._collectors.append(collector)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def _sample_lines(kind: str, name: str, documentation: str, samples: Dict[str, float],
+                  label: Optional[str]) -> List[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for key, value in samples.items():
+        label_text = f'{{{label}="{_escape(key)}"}}' if label else ""
+        lines.append(f"{name}{label_text} {_number(value)}")
+    return lines
+
+
+def gauge_lines(name: str, documentation: str, samples: Dict[str, float], label: Optional[str] = None) -> List[str]:
+    """Exposition lines for a scrape-time gauge: a current value such as a size (helper for collectors)."""
+    return _sample_lines("gauge", name, documentation, samples, label)
+
+
+def counter_lines(name: str, documentation: str, samples: Dict[str, float], label: Optional[str] = None) -> List[str]:
+    """Exposition lines for a scrape-time counter: a running total kept elsewhere (name ends in _total)."""
+    return _sample_lines("counter", name, documentation, samples, label)
+
+
+# Singleton registry and the application's metrics
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "medz4_http_requests_total", "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram(
+    "medz4_http_request_duration_seconds", "HTTP request latency by method and route template.",
+    ("method", "route"))
+HTTP_IN_FLIGHT = registry.gauge(
+    "medz4_http_requests_in_flight", "HTTP requests currently being served.")
+
+CCOW_CALLS = registry.counter(
+    "medz4_ccow_requests_total", "CCOW Vault calls by operation and outcome.",
+    ("operation", "outcome"))
+CCOW_LOOKUPS = registry.counter(
+    "medz4_ccow_active_patient_lookups_total", "get_active_patient lookups by result (hit, coalesced, miss).",
+    ("result",))
+
+DB_QUERY_LATENCY = registry.histogram(
+    "medz4_db_query_duration_seconds", "SQL statement execution time by statement fingerprint "
+    "(see /monitoring/queries for the normalized SQL).",
+    ("statement",))
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count, latency and in-flight
+    requests. Routes are labelled by their template (e.g., /patient/{icn}),
+    never by the raw path, so labels stay bounded and free of PHI.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # FastAPI stores the matched route in the scope during routing
+            route = scope.get("route")
+            if route is not None:
+                route_label = route.path
+            elif scope["path"].startswith("/static/"):
+                route_label = "/static"
+            else:
+                route_label = "unmatched"
+
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route_label, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route_label)
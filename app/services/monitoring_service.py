@@ -6,82 +6,162 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional, Tuple
 import httpx
 import logging
+import base64
+import json
+import time
+import uuid
 from datetime import datetime, timezone
 
+from app.services.ccow_service import ccow_service
 from config import settings
 
 logger = logging.getLogger(__name__)
 
 
-async def get_active_sessions(db: AsyncSession) -> Dict[str, Any]:
+SESSIONS_PAGE_SIZE = 50
+SESSIONS_MAX_PAGE_SIZE = 200
+
+
+async def get_active_sessions(
+    db: AsyncSession,
+    user: Optional[str] = None,
+    ip: Optional[str] = None,
+    cursor: Optional[str] = None,
+    direction: str = "next",
+    page_size: int = SESSIONS_PAGE_SIZE
+) -> Dict[str, Any]:
     """
-    Fetch active sessions with user information.
-    Returns summary and detailed session list.
+    Fetch summary counts and one page of active (unexpired) sessions in a
+    single statement: window functions count the whole filtered set while
+    the page is keyset-paginated on (created_at DESC, session_id DESC),
+    so later pages cost the same as the first.
+
+    Filters:
+        user: case-insensitive substring of display name or email
+        ip: IP address prefix
+
+    Args:
+        cursor: opaque cursor from a previous page (next_cursor/prev_cursor)
+        direction: "next" (older sessions) or "prev" (newer sessions)
+
+    Timestamps are returned as naive UTC datetimes; the template renders
+    them as relative times in the browser.
     """
     try:
-        query = text("""
+        page_size = max(1, min(page_size, SESSIONS_MAX_PAGE_SIZE))
+        forward = direction != "prev"
+
+        conditions = ["s.is_active = TRUE", "s.expires_at > :now"]
+        params: Dict[str, Any] = {"now": datetime.utcnow(), "limit": page_size + 1}
+
+        if user and user.strip():
+            conditions.append("(u.display_name ILIKE :user_pattern OR u.email ILIKE :user_pattern)")
+            params["user_pattern"] = "%" + _escape_like(user.strip()) + "%"
+        if ip and ip.strip():
+            conditions.append("s.ip_address LIKE :ip_prefix")
+            params["ip_prefix"] = _escape_like(ip.strip()) + "%"
+
+        position = _decode_sessions_cursor(cursor) if cursor else None
+        page_condition = "TRUE"
+        if position:
+            comparison = "<" if forward else ">"
+            page_condition = f"(sort_created, session_id) {comparison} (:cursor_created, :cursor_session_id)"
+            params["cursor_created"], params["cursor_session_id"] = position
+
+        order = "DESC" if forward else "ASC"
+
+        # The anchor row keeps the counts when the page itself is empty
+        query = text(f"""
+            WITH active AS (
+                SELECT
+                    s.session_id,
+                    s.user_id,
+                    COALESCE(s.created_at, 'epoch'::timestamp) AS sort_created,
+                    s.created_at,
+                    s.expires_at,
+                    s.last_activity_at,
+                    s.ip_address,
+                    u.display_name,
+                    u.email,
+                    ROW_NUMBER() OVER (PARTITION BY s.user_id) AS user_session_number
+                FROM auth.sessions s
+                JOIN auth.users u ON s.user_id = u.user_id
+                WHERE {' AND '.join(conditions)}
+            ),
+            counted AS (
+                SELECT
+                    active.*,
+                    COUNT(*) OVER () AS total_sessions,
+                    COUNT(*) FILTER (WHERE user_session_number = 1) OVER () AS unique_users
+                FROM active
+            ),
+            page AS (
+                SELECT *
+                FROM counted
+                WHERE {page_condition}
+                ORDER BY sort_created {order}, session_id {order}
+                LIMIT :limit
+            ),
+            summary AS (
+                SELECT total_sessions, unique_users FROM counted LIMIT 1
+            )
             SELECT
-                s.session_id,
-                u.display_name,
-                u.email,
-                s.created_at,
-                s.expires_at,
-                s.last_activity_at,
-                s.ip_address
-            FROM auth.sessions s
-            JOIN auth.users u ON s.user_id = u.user_id
-            WHERE s.is_active = TRUE
-            ORDER BY s.created_at DESC
+                COALESCE(summary.total_sessions, 0) AS total_sessions,
+                COALESCE(summary.unique_users, 0) AS unique_users,
+                page.session_id,
+                page.sort_created,
+                page.display_name,
+                page.email,
+                page.created_at,
+                page.expires_at,
+                page.last_activity_at,
+                page.ip_address
+            FROM (SELECT 1) AS anchor
+            LEFT JOIN summary ON TRUE
+            LEFT JOIN page ON TRUE
+            ORDER BY page.sort_created {order}, page.session_id {order}
         """)
 
-        result = await db.execute(query)
+        result = await db.execute(query, params)
         rows = result.fetchall()
 
-        # Get summary counts
-        summary_query = text("""
-            SELECT
-                COUNT(DISTINCT s.user_id) as unique_users,
-                COUNT(s.session_id) as total_sessions
-            FROM auth.sessions s
-            WHERE s.is_active = TRUE
-        """)
+        summary = {
+            "total_sessions": rows[0].total_sessions if rows else 0,
+            "unique_users": rows[0].unique_users if rows else 0,
+        }
+        sessions = [
+            {
+                "session_id": str(row.session_id)[:8] + "...",  # Truncated for display
+                "display_name": row.display_name,
+                "email": row.email,
+                "created_at": row.created_at,
+                "expires_at": row.expires_at,
+                "last_activity_at": row.last_activity_at,
+                "ip_address": row.ip_address or "N/A",
+                "sort_key": (row.sort_created, row.session_id),
+            }
+            for row in rows if row.session_id is not None
+        ]
 
-        summary_result = await db.execute(summary_query)
-        summary_row = summary_result.fetchone()
-
-        sessions = []
-        for row in rows:
-            # Calculate time ago for created_at
-            if row[3]:  # created_at
-                time_ago = _format_time_ago(row[3])
-            else:
-                time_ago = "Unknown"
-
-            # Calculate expires in
-            if row[4]:  # expires_at
-                expires_in = _format_time_until(row[4])
-            else:
-                expires_in = "Unknown"
-
-            sessions.append({
-                "session_id": str(row[0])[:8] + "...",  # Truncated for display
-                "display_name": row[1],
-                "email": row[2],
-                "created_ago": time_ago,
-                "expires_in": expires_in,
-                "ip_address": row[6] or "N/A"
-            })
+        has_more = len(sessions) > page_size
+        sessions = sessions[:page_size]
+
+        if not forward:
+            # Fetched backwards from the cursor; restore display order
+            sessions.reverse()
+
+        has_next = has_more if forward else position is not None
+        has_prev = (position is not None) if forward else has_more
 
         return {
             "success": True,
-            "summary": {
-                "unique_users": summary_row[0] if summary_row else 0,
-                "total_sessions": summary_row[1] if summary_row else 0
-            },
-            "sessions": sessions
+            "summary": summary,
+            "sessions": sessions,
+            "next_cursor": _encode_sessions_cursor(sessions[-1]["sort_key"]) if sessions and has_next else None,
+            "prev_cursor": _encode_sessions_cursor(sessions[0]["sort_key"]) if sessions and has_prev else None,
         }
 
     except Exception as e:
@@ -93,30 +173,85 @@ async def get_active_sessions(db: AsyncSession) -> Dict[str, Any]:
         }
 
 
-async def get_database_health(db: AsyncSession) -> Dict[str, Any]:
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards in user input."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _encode_sessions_cursor(key: Tuple[datetime, uuid.UUID]) -> str:
+    """Opaque, URL-safe cursor for a session row's sort key."""
+    sort_created, session_id = key
+    return base64.urlsafe_b64encode(
+        json.dumps([sort_created.isoformat(), str(session_id)]).encode("utf-8")
+    ).decode("ascii")
+
+
+def _decode_sessions_cursor(cursor: str) -> Optional[Tuple[datetime, uuid.UUID]]:
+    """Decode a sessions cursor; invalid cursors restart from the first page."""
+    try:
+        created, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created), uuid.UUID(session_id)
+    except (ValueError, TypeError):
+        logger.warning("Ignoring invalid sessions cursor")
+        return None
+
+
+# MAX(last_updated) is an index-only scan with
+# db/ddl/create_patient_last_updated_index.sql; the cache covers repeated
+# clicks and databases where the index has not been created yet.
+LAST_ETL_CACHE_SECONDS = 60.0
+_last_etl_cache: Dict[str, Any] = {"value": None, "fetched_at": None}
+
+# Catalog and statistics figures only: no table is scanned.
+# reltuples is the planner estimate maintained by VACUUM/ANALYZE (-1 = never analyzed).
+DATABASE_STATS_QUERY = text("""
+    SELECT
+        (SELECT c.reltuples::bigint FROM pg_class c
+         WHERE c.oid = to_regclass('clinical.patient_demographics')) AS approx_patients,
+        d.numbackends,
+        (SELECT COUNT(*) FROM pg_stat_activity
+         WHERE datname = current_database() AND state = 'active') AS active_backends,
+        d.blks_hit,
+        d.blks_read,
+        d.deadlocks,
+        d.xact_commit,
+        d.xact_rollback
+    FROM pg_stat_database d
+    WHERE d.datname = current_database()
+""")
+
+
+async def get_database_health(db: AsyncSession, exact: bool = False) -> Dict[str, Any]:
     """
     Check database connectivity and return basic statistics.
+
+    The default probe is cheap enough to click repeatedly: it times a bare
+    SELECT 1 for latency, reads the approximate patient count from
+    pg_class.reltuples, takes the last ETL timestamp from a short-lived
+    cache, and reports pg_stat_database figures (cache hit ratio,
+    backends, deadlocks). exact=True runs COUNT(*) and MAX(last_updated)
+    over clinical.patient_demographics instead.
     """
     try:
-        # Test connection with simple query
-        start_time = datetime.now()
+        start_time = time.perf_counter()
 
-        # Get patient count
-        patient_count_query = text("""
-            SELECT COUNT(*) FROM clinical.patient_demographics
-        """)
-        result = await db.execute(patient_count_query)
-        patient_count = result.scalar()
+        # Round-trip latency
+        await db.execute(text("SELECT 1"))
+        latency_ms = round((time.perf_counter() - start_time) * 1000, 1)
 
-        # Get last ETL update
-        last_update_query = text("""
-            SELECT MAX(last_updated) FROM clinical.patient_demographics
-        """)
-        result = await db.execute(last_update_query)
-        last_update = result.scalar()
+        stats = (await db.execute(DATABASE_STATS_QUERY)).fetchone()
+
+        if exact:
+            patient_count = (await db.execute(
+                text("SELECT COUNT(*) FROM clinical.patient_demographics")
+            )).scalar()
+        else:
+            approx = stats.approx_patients if stats else None
+            patient_count = approx if approx is not None and approx >= 0 else None
+
+        last_update = await _get_last_etl_update(db, refresh=exact)
 
-        end_time = datetime.now()
-        response_time_ms = int((end_time - start_time).total_seconds() * 1000)
+        response_time_ms = int((time.perf_counter() - start_time) * 1000)
 
         # Format last update time
         if last_update:
@@ -124,12 +259,24 @@ async def get_database_health(db: AsyncSession) -> Dict[str, Any]:
         else:
             last_update_str = "Unknown"
 
+        cache_hit_ratio = None
+        if stats and (stats.blks_hit + stats.blks_read) > 0:
+            cache_hit_ratio = round(100.0 * stats.blks_hit / (stats.blks_hit + stats.blks_read), 2)
+
         return {
             "success": True,
             "status": "Connected",
+            "exact": exact,
             "patient_count": patient_count,
             "last_etl_update": last_update_str,
-            "response_time_ms": response_time_ms
+            "latency_ms": latency_ms,
+            "response_time_ms": response_time_ms,
+            "cache_hit_ratio": cache_hit_ratio,
+            "connections": stats.numbackends if stats else None,
+            "active_backends": stats.active_backends if stats else None,
+            "deadlocks": stats.deadlocks if stats else None,
+            "commits": stats.xact_commit if stats else None,
+            "rollbacks": stats.xact_rollback if stats else None,
         }
 
     except Exception as e:
@@ -141,6 +288,18 @@ async def get_database_health(db: AsyncSession) -> Dict[str, Any]:
         }
 
 
+async def _get_last_etl_update(db: AsyncSession, refresh: bool = False) -> Optional[datetime]:
+    """MAX(last_updated) of clinical.patient_demographics, cached for LAST_ETL_CACHE_SECONDS."""
+    fetched_at = _last_etl_cache["fetched_at"]
+    if not refresh and fetched_at is not None and time.monotonic() - fetched_at < LAST_ETL_CACHE_SECONDS:
+        return _last_etl_cache["value"]
+
+    result = await db.execute(text("SELECT MAX(last_updated) FROM clinical.patient_demographics"))
+    _last_etl_cache["value"] = result.scalar()
+    _last_etl_cache["fetched_at"] = time.monotonic()
+    return _last_etl_cache["value"]
+
+
 async def get_medz1_health() -> Dict[str, Any]:
     """
     Check if med-z1 application is reachable.
@@ -179,49 +338,49 @@ async def get_ccow_active_patients(session_id: str) -> Dict[str, Any]:
         url = f"{settings.ccow.base_url}/ccow/active-patients"
         headers = {"X-Session-ID": session_id}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, timeout=2.0)
-
-            if response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": f"CCOW returned status {response.status_code}",
-                    "contexts": []
-                }
-
-            data = response.json()
-
-            # Transform contexts for display
-            contexts = []
-            for ctx in data.get("contexts", []):
-                # Parse timestamp for sorting
-                set_at_dt = None
-                set_at_str = "Unknown"
-                if ctx.get("set_at"):
-                    set_at_dt = datetime.fromisoformat(ctx["set_at"].replace('Z', '+00:00'))
-                    set_at_str = _format_time_ago(set_at_dt)
-
-                contexts.append({
-                    "email": ctx.get("email", "Unknown"),
-                    "patient_id": ctx.get("patient_id", "N/A"),
-                    "set_by": ctx.get("set_by", "unknown"),
-                    "set_at": set_at_str,
-                    "_set_at_dt": set_at_dt  # Keep for sorting
-                })
-
-            # Sort by timestamp descending (most recent first)
-            contexts.sort(key=lambda x: x["_set_at_dt"] or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
-
-            # Remove internal sorting field
-            for ctx in contexts:
-                ctx.pop("_set_at_dt", None)
+        # Shared keep-alive client owned by the application lifespan
+        response = await ccow_service.client.get(url, headers=headers, timeout=2.0)
 
+        if response.status_code != 200:
             return {
-                "success": True,
-                "total_count": data.get("total_count", 0),
-                "contexts": contexts
+                "success": False,
+                "error": f"CCOW returned status {response.status_code}",
+                "contexts": []
             }
 
+        data = response.json()
+
+        # Transform contexts for display
+        contexts = []
+        for ctx in data.get("contexts", []):
+            # Parse timestamp for sorting
+            set_at_dt = None
+            set_at_str = "Unknown"
+            if ctx.get("set_at"):
+                set_at_dt = datetime.fromisoformat(ctx["set_at"].replace('Z', '+00:00'))
+                set_at_str = _format_time_ago(set_at_dt)
+
+            contexts.append({
+                "email": ctx.get("email", "Unknown"),
+                "patient_id": ctx.get("patient_id", "N/A"),
+                "set_by": ctx.get("set_by", "unknown"),
+                "set_at": set_at_str,
+                "_set_at_dt": set_at_dt  # Keep for sorting
+            })
+
+        # Sort by timestamp descending (most recent first)
+        contexts.sort(key=lambda x: x["_set_at_dt"] or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+
+        # Remove internal sorting field
+        for ctx in contexts:
+            ctx.pop("_set_at_dt", None)
+
+        return {
+            "success": True,
+            "total_count": data.get("total_count", 0),
+            "contexts": contexts
+        }
+
     except Exception as e:
         logger.error(f"Error fetching CCOW active patients: {e}")
         return {
@@ -245,60 +404,60 @@ async def get_ccow_history(session_id: str, limit: int = 30) -> Dict[str, Any]:
         headers = {"X-Session-ID": session_id}
         params = {"scope": "global"}  # Note: CCOW Vault doesn't support limit parameter
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params, timeout=2.0)
-
-            if response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": f"CCOW returned status {response.status_code}",
-                    "history": []
-                }
-
-            data = response.json()
-
-            # Transform history events for display
-            history = []
-            for event in data.get("history", []):
-                # Parse timestamp for sorting
-                ts_dt = None
-                timestamp_str = "Unknown"
-                if event.get("timestamp"):
-                    ts_dt = datetime.fromisoformat(event["timestamp"].replace('Z', '+00:00'))
-                    timestamp_str = _format_time_ago(ts_dt)
-
-                # Format action with emoji
-                action = event.get("action", "unknown")
-                action_display = "🔵 Set" if action == "set" else "⚪ Clear"
-
-                history.append({
-                    "action": action_display,
-                    "email": event.get("email", "Unknown"),
-                    "patient_id": event.get("patient_id") or "—",
-                    "actor": event.get("actor", "unknown"),
-                    "timestamp": timestamp_str,
-                    "_timestamp_dt": ts_dt  # Keep for sorting
-                })
-
-            # Sort by timestamp descending (most recent first)
-            history.sort(key=lambda x: x["_timestamp_dt"] or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
-
-            # Get total count before limiting
-            total_count = len(history)
-
-            # Limit to requested number of events
-            history = history[:limit]
-
-            # Remove internal sorting field
-            for event in history:
-                event.pop("_timestamp_dt", None)
+        # Shared keep-alive client owned by the application lifespan
+        response = await ccow_service.client.get(url, headers=headers, params=params, timeout=2.0)
 
+        if response.status_code != 200:
             return {
-                "success": True,
-                "total_count": total_count,
-                "history": history
+                "success": False,
+                "error": f"CCOW returned status {response.status_code}",
+                "history": []
             }
 
+        data = response.json()
+
+        # Transform history events for display
+        history = []
+        for event in data.get("history", []):
+            # Parse timestamp for sorting
+            ts_dt = None
+            timestamp_str = "Unknown"
+            if event.get("timestamp"):
+                ts_dt = datetime.fromisoformat(event["timestamp"].replace('Z', '+00:00'))
+                timestamp_str = _format_time_ago(ts_dt)
+
+            # Format action with emoji
+            action = event.get("action", "unknown")
+            action_display = "🔵 Set" if action == "set" else "⚪ Clear"
+
+            history.append({
+                "action": action_display,
+                "email": event.get("email", "Unknown"),
+                "patient_id": event.get("patient_id") or "—",
+                "actor": event.get("actor", "unknown"),
+                "timestamp": timestamp_str,
+                "_timestamp_dt": ts_dt  # Keep for sorting
+            })
+
+        # Sort by timestamp descending (most recent first)
+        history.sort(key=lambda x: x["_timestamp_dt"] or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+
+        # Get total count before limiting
+        total_count = len(history)
+
+        # Limit to requested number of events
+        history = history[:limit]
+
+        # Remove internal sorting field
+        for event in history:
+            event.pop("_timestamp_dt", None)
+
+        return {
+            "success": True,
+            "total_count": total_count,
+            "history": history
+        }
+
     except Exception as e:
         logger.error(f"Error fetching CCOW history: {e}")
         return {
@@ -331,25 +490,3 @@ def _format_time_ago(dt: datetime) -> str:
         return f"{int(seconds / 3600)}h ago"
     else:
         return f"{int(seconds / 86400)}d ago"
-
-
-def _format_time_until(dt: datetime) -> str:
-    """Format datetime as 'in 5 min', 'in 2 hours', 'expired', etc."""
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-
-    now = datetime.now(timezone.utc)
-    delta = dt - now
-
-    seconds = delta.total_seconds()
-
-    if seconds < 0:
-        return "expired"
-    elif seconds < 60:
-        return f"in {int(seconds)}s"
-    elif seconds < 3600:
-        return f"in {int(seconds / 60)}m"
-    elif seconds < 86400:
-        return f"in {int(seconds / 3600)}h"
-    else:
-        return f"in {int(seconds / 86400)}d"
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------
+# app/services/password_verifier.py
+# -----------------------------------------------------------
+# bcrypt verification on a bounded thread pool, so login
+# surges do not block the event loop
+# -----------------------------------------------------------
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+import bcrypt
+
+from app.services.metrics import registry
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# bcrypt cost 12 takes ~250 ms; waits past a few seconds mean the pool is undersized
+VERIFY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PASSWORD_QUEUE_WAIT = registry.histogram(
+    "medz4_password_verify_queue_seconds", "Time a login waited for a password verification slot.",
+    buckets=VERIFY_BUCKETS)
+PASSWORD_VERIFY_TIME = registry.histogram(
+    "medz4_password_verify_seconds", "bcrypt verification time on the worker thread.",
+    buckets=VERIFY_BUCKETS)
+PASSWORD_REJECTED = registry.counter(
+    "medz4_password_verify_rejected_total", "Logins turned away because the verification queue was full.")
+
+
+class LoginBusy(Exception):
+    """Raised when SESSION_PASSWORD_QUEUE_MAX logins are already waiting."""
+
+
+def check_password(plain_password: str, password_hash: str) -> bool:
+    """Verify a plain password against a bcrypt hash (blocking; runs on a worker thread)."""
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode('utf-8'),
+            password_hash.encode('utf-8')
+        )
+    except Exception as e:
+        logger.error(f"Password verification error: {e}")
+        return False
+
+
+class PasswordVerifier:
+    """
+    Runs bcrypt.checkpw on a dedicated thread pool (bcrypt releases the GIL
+    while hashing). At most max_workers verifications run at once; further
+    logins wait in line, and beyond max_waiting they are rejected with
+    LoginBusy rather than piling up behind a surge.
+    """
+
+    def __init__(self, max_workers: int, max_waiting: int):
+        self.max_workers = max(1, max_workers)
+        self.max_waiting = max_waiting
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.in_progress = 0
+        self.verified = 0
+        self.rejected = 0
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+    async def verify(self, plain_password: str, password_hash: str) -> bool:
+        """Verify a password without blocking the event loop. Raises LoginBusy when saturated."""
+        self._ensure_started()
+
+        if self.max_waiting > 0 and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            PASSWORD_REJECTED.inc()
+            raise LoginBusy("Too many logins in progress")
+
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.perf_counter()
+        PASSWORD_QUEUE_WAIT.observe(started - queued)
+        self.in_progress += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, check_password, plain_password, password_hash)
+        finally:
+            self.in_progress -= 1
+            self.verified += 1
+            self._semaphore.release()
+            PASSWORD_VERIFY_TIME.observe(time.perf_counter() - started)
+
+    def close(self) -> None:
+        """Shut down the worker threads (called on application shutdown)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._semaphore = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and counters for monitoring."""
+        return {
+            "max_workers": self.max_workers,
+            "max_waiting": self.max_waiting,
+            "waiting": self.waiting,
+            "in_progress": self.in_progress,
+            "verified": self.verified,
+            "rejected": self.rejected,
+        }
+
+
+# Singleton instance
+password_verifier = PasswordVerifier(
+    max_workers=settings.session.password_workers,
+    max_waiting=settings.session.password_queue_max,
+)
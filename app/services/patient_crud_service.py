@@ -5,135 +5,237 @@
 # -----------------------------------------------------------
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy import text
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Deque
+from collections import deque
 from datetime import datetime, timezone, date
+import asyncio
 import logging
 
+from database import AsyncSessionLocal
+from app.services.demographics_cache import demographics_cache
+from app.services.invalidation_bus import invalidation_bus
+from config import settings
+
 logger = logging.getLogger(__name__)
 
 
+# med-z4 ICN series (ICN999001 - ICN999999), backed by a Postgres sequence
+# created by db/ddl/create_icn_sequence.sql
+ICN_SEQUENCE = "clinical.med_z4_icn_seq"
+ICN_SERIES_MIN = 999001
+ICN_SERIES_MAX = 999999
+
+
+class IcnSeriesExhausted(ValueError):
+    """Raised when the 999 series has no ICNs left to allocate."""
+
+
+class IcnAllocator:
+    """
+    Per-worker ICN allocator backed by a Postgres sequence.
+
+    Each worker reserves a block of sequence values in one round trip and
+    hands them out from memory, so creates never scan patient_demographics
+    and concurrent creates (in this or any other worker) never collide.
+    The sequence's MAXVALUE enforces the 999 series upper bound; block
+    requests are clipped to the values left so none are burned at the end.
+    Values still buffered when a worker stops are skipped, not reused.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = max(1, block_size)
+        self._buffer: Deque[int] = deque()
+        self._lock = asyncio.Lock()
+        self._allocated = 0
+        self._blocks_reserved = 0
+
+    async def allocate(self, count: int = 1) -> List[str]:
+        """
+        Return `count` unused ICNs (e.g., ["ICN999042", ...]).
+        Raises IcnSeriesExhausted if the series cannot supply them all;
+        values already reserved stay buffered for later callers.
+        """
+        async with self._lock:
+            while len(self._buffer) < count:
+                needed = max(self.block_size, count - len(self._buffer))
+                if not await self._reserve_block(needed):
+                    raise IcnSeriesExhausted(
+                        f"ICN 999 series exhausted (max: ICN{ICN_SERIES_MAX})"
+                    )
+
+            self._allocated += count
+            return [f"ICN{self._buffer.popleft():06d}" for _ in range(count)]
+
+    async def _reserve_block(self, size: int) -> int:
+        """Pull up to `size` values from the sequence; returns how many were added."""
+        # Own session: nextval is not transactional, and a failure here must
+        # not abort the caller's INSERT transaction
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(
+                    text(f"""
+                        SELECT nextval('{ICN_SEQUENCE}')
+                        FROM generate_series(1, LEAST(
+                            :size,
+                            (SELECT :series_max - CASE WHEN is_called THEN last_value ELSE last_value - 1 END
+                             FROM {ICN_SEQUENCE})
+                        ))
+                    """),
+                    {"size": size, "series_max": ICN_SERIES_MAX}
+                )
+                values = [row[0] for row in result.fetchall()]
+            except DBAPIError as e:
+                if getattr(e.orig, "sqlstate", None) == "2200H":
+                    # sequence_generator_limit_exceeded: another worker took the last values
+                    return 0
+                if getattr(e.orig, "sqlstate", None) == "42P01":
+                    raise RuntimeError(
+                        f"ICN sequence {ICN_SEQUENCE} not found; "
+                        f"apply db/ddl/create_icn_sequence.sql"
+                    ) from e
+                raise
+
+        values = [v for v in values if ICN_SERIES_MIN <= v <= ICN_SERIES_MAX]
+        self._buffer.extend(values)
+        if values:
+            self._blocks_reserved += 1
+            logger.debug(f"Reserved ICN block {values[0]}-{values[-1]} ({len(values)} values)")
+        return len(values)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return allocator counters for monitoring."""
+        return {
+            "block_size": self.block_size,
+            "buffered": len(self._buffer),
+            "allocated": self._allocated,
+            "blocks_reserved": self._blocks_reserved,
+        }
+
+
+icn_allocator = IcnAllocator(block_size=settings.app.icn_block_size)
+
+
 async def generate_next_icn(db: AsyncSession) -> str:
     """
     Generate next available ICN in the 999 series.
     Returns ICN in format: ICN999001, ICN999002, etc.
+
+    Allocated from the per-worker IcnAllocator block (db is not used; the
+    allocator reserves blocks on its own connection).
     """
     try:
-        result = await db.execute(text(
-            "SELECT MAX(icn) FROM clinical.patient_demographics WHERE icn LIKE 'ICN999%'"
-        ))
-        max_icn = result.scalar()
-
-        if max_icn:
-            # Extract number: "ICN999042" -> 999042
-            current_num = int(max_icn.replace("ICN", ""))
-            next_num = current_num + 1
-        else:
-            # First patient in 999 series
-            next_num = 999001
-
-        # Check if we've exhausted the series
-        if next_num > 999999:
-            raise ValueError("ICN 999 series exhausted (max: ICN999999)")
-
-        return f"ICN{next_num:06d}"
+        icns = await icn_allocator.allocate(1)
+        return icns[0]
 
     except Exception as e:
         logger.error(f"Error generating ICN: {e}")
         raise
 
 
-async def create_patient(db: AsyncSession, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+# Columns written for a new patient (create_patient and bulk import)
+PATIENT_COLUMNS = [
+    "patient_key", "icn", "ssn", "ssn_last4",
+    "name_last", "name_first", "name_display",
+    "dob", "age", "sex",
+    "primary_station", "primary_station_name",
+    "address_street1", "address_street2", "address_city", "address_state", "address_zip",
+    "phone_primary", "insurance_company_name",
+    "marital_status", "religion", "service_connected_percent",
+    "deceased_flag", "death_date",
+    "source_system", "last_updated",
+]
+
+
+def build_patient_row(patient_data: Dict[str, Any], icn: str) -> Dict[str, Any]:
+    """
+    Build the full patient_demographics row for a new patient.
+    Derives patient_key, name_display, age, ssn_last4 and timestamps.
+    """
+    # Calculate age from DOB
+    age = None
+    if patient_data.get("dob"):
+        dob = datetime.fromisoformat(patient_data["dob"])
+        today = datetime.now()
+        age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+    # Generate name_display
+    name_last = patient_data.get("name_last") or ""
+    name_first = patient_data.get("name_first") or ""
+    name_display = f"{name_last.upper()}, {name_first.capitalize()}" if name_last and name_first else ""
+
+    # Extract last 4 of SSN if full SSN provided
+    ssn_last4 = patient_data.get("ssn_last4")
+    if not ssn_last4 and patient_data.get("ssn"):
+        ssn_last4 = patient_data["ssn"].replace("-", "")[-4:]
+
+    # Convert date strings to date objects for database
+    dob_date = datetime.fromisoformat(patient_data["dob"]).date() if patient_data.get("dob") else None
+    death_date_obj = datetime.fromisoformat(patient_data["death_date"]).date() if patient_data.get("death_date") else None
+
+    return {
+        "patient_key": icn,  # patient_key same as ICN
+        "icn": icn,
+        "ssn": patient_data.get("ssn"),
+        "ssn_last4": ssn_last4,
+        "name_last": name_last,
+        "name_first": name_first,
+        "name_display": name_display,
+        "dob": dob_date,
+        "age": age,
+        "sex": patient_data.get("sex"),
+        "primary_station": patient_data.get("primary_station"),
+        "primary_station_name": patient_data.get("primary_station_name"),
+        "address_street1": patient_data.get("address_street1"),
+        "address_street2": patient_data.get("address_street2"),
+        "address_city": patient_data.get("address_city"),
+        "address_state": patient_data.get("address_state"),
+        "address_zip": patient_data.get("address_zip"),
+        "phone_primary": patient_data.get("phone_primary"),
+        "insurance_company_name": patient_data.get("insurance_company_name"),
+        "marital_status": patient_data.get("marital_status"),
+        "religion": patient_data.get("religion"),
+        "service_connected_percent": patient_data.get("service_connected_percent"),
+        "deceased_flag": patient_data.get("deceased_flag"),
+        "death_date": death_date_obj,
+        "source_system": "med-z4",
+        "last_updated": datetime.now(timezone.utc)
+    }
+
+
+async def create_patient(
+    db: AsyncSession,
+    patient_data: Dict[str, Any],
+    session_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Create a new patient record.
     Auto-generates ICN, patient_key, name_display, age, and timestamps.
+    session_id (the writer's session) gets read-your-writes routing.
     """
     try:
         # Generate ICN
         icn = await generate_next_icn(db)
-
-        # Calculate age from DOB
-        age = None
-        if patient_data.get("dob"):
-            dob = datetime.fromisoformat(patient_data["dob"])
-            today = datetime.now()
-            age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-
-        # Generate name_display
-        name_last = patient_data.get("name_last", "")
-        name_first = patient_data.get("name_first", "")
-        name_display = f"{name_last.upper()}, {name_first.capitalize()}" if name_last and name_first else ""
-
-        # Extract last 4 of SSN if full SSN provided
-        ssn_last4 = patient_data.get("ssn_last4")
-        if not ssn_last4 and patient_data.get("ssn"):
-            ssn_last4 = patient_data["ssn"].replace("-", "")[-4:]
-
-        # Convert date strings to date objects for database
-        dob_date = datetime.fromisoformat(patient_data["dob"]).date() if patient_data.get("dob") else None
-        death_date_obj = datetime.fromisoformat(patient_data["death_date"]).date() if patient_data.get("death_date") else None
+        row = build_patient_row(patient_data, icn)
 
         # Prepare INSERT statement
-        insert_query = text("""
-            INSERT INTO clinical.patient_demographics (
-                patient_key, icn, ssn, ssn_last4,
-                name_last, name_first, name_display,
-                dob, age, sex,
-                primary_station, primary_station_name,
-                address_street1, address_street2, address_city, address_state, address_zip,
-                phone_primary, insurance_company_name,
-                marital_status, religion, service_connected_percent,
-                deceased_flag, death_date,
-                source_system, last_updated
-            ) VALUES (
-                :patient_key, :icn, :ssn, :ssn_last4,
-                :name_last, :name_first, :name_display,
-                :dob, :age, :sex,
-                :primary_station, :primary_station_name,
-                :address_street1, :address_street2, :address_city, :address_state, :address_zip,
-                :phone_primary, :insurance_company_name,
-                :marital_status, :religion, :service_connected_percent,
-                :deceased_flag, :death_date,
-                :source_system, :last_updated
-            )
+        insert_query = text(f"""
+            INSERT INTO clinical.patient_demographics ({", ".join(PATIENT_COLUMNS)})
+            VALUES ({", ".join(":" + column for column in PATIENT_COLUMNS)})
         """)
 
         # Execute insert
-        await db.execute(insert_query, {
-            "patient_key": icn,  # patient_key same as ICN
-            "icn": icn,
-            "ssn": patient_data.get("ssn"),
-            "ssn_last4": ssn_last4,
-            "name_last": name_last,
-            "name_first": name_first,
-            "name_display": name_display,
-            "dob": dob_date,
-            "age": age,
-            "sex": patient_data.get("sex"),
-            "primary_station": patient_data.get("primary_station"),
-            "primary_station_name": patient_data.get("primary_station_name"),
-            "address_street1": patient_data.get("address_street1"),
-            "address_street2": patient_data.get("address_street2"),
-            "address_city": patient_data.get("address_city"),
-            "address_state": patient_data.get("address_state"),
-            "address_zip": patient_data.get("address_zip"),
-            "phone_primary": patient_data.get("phone_primary"),
-            "insurance_company_name": patient_data.get("insurance_company_name"),
-            "marital_status": patient_data.get("marital_status"),
-            "religion": patient_data.get("religion"),
-            "service_connected_percent": patient_data.get("service_connected_percent"),
-            "deceased_flag": patient_data.get("deceased_flag"),
-            "death_date": death_date_obj,
-            "source_system": "med-z4",
-            "last_updated": datetime.now(timezone.utc)
-        })
+        await db.execute(insert_query, row)
 
         await db.commit()
+        await invalidation_bus.invalidate_patients([icn])
+        await invalidation_bus.note_session_write(session_id)
 
         return {
             "success": True,
             "icn": icn,
-            "name_display": name_display
+            "name_display": row["name_display"]
         }
 
     except Exception as e:
@@ -145,7 +247,12 @@ async def create_patient(db: AsyncSession, patient_data: Dict[str, Any]) -> Dict
         }
 
 
-async def update_patient(db: AsyncSession, icn: str, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+async def update_patient(
+    db: AsyncSession,
+    icn: str,
+    patient_data: Dict[str, Any],
+    session_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Update existing patient record.
     Recalculates age and name_display if relevant fields changed.
@@ -221,6 +328,8 @@ async def update_patient(db: AsyncSession, icn: str, patient_data: Dict[str, Any
 
         result = await db.execute(update_query, params)
         await db.commit()
+        await invalidation_bus.invalidate_patients([icn])
+        await invalidation_bus.note_session_write(session_id)
 
         if result.rowcount == 0:
             return {"success": False, "error": "Patient not found"}
@@ -240,101 +349,158 @@ async def update_patient(db: AsyncSession, icn: str, patient_data: Dict[str, Any
         }
 
 
-async def delete_patient(db: AsyncSession, icn: str) -> Dict[str, Any]:
-    """
-    Hard delete patient record with cascading delete of all clinical data.
-    WARNING: This permanently removes the patient and ALL associated clinical records.
+# Clinical tables keyed by patient_key, removed with the patient (children first)
+CLINICAL_TABLES = [
+    "patient_vitals",
+    "patient_flags",
+    "patient_flag_history",
+    "patient_allergies",
+    "patient_allergy_reactions",
+    "patient_medications_outpatient",
+    "patient_medications_inpatient",
+    "patient_encounters",
+    "patient_labs",
+    "patient_clinical_notes",
+    "patient_immunizations"
+]
 
-    Cascade order:
-    1. Delete from all clinical tables (vitals, allergies, medications, etc.)
-    2. Delete from patient_demographics
+# Subset of CLINICAL_TABLES present in this database (resolved once per worker)
+_cascade_tables: Optional[List[str]] = None
+
+
+async def _get_cascade_tables(db: AsyncSession) -> List[str]:
     """
-    try:
-        logger.info(f"Starting delete operation for patient: {icn}")
+    Return the clinical tables that exist and have a patient_key column.
+    Keeps the cascade defensive (as before) without a failing DELETE per
+    missing table.
+    """
+    global _cascade_tables
+    if _cascade_tables is None:
+        result = await db.execute(
+            text("""
+                SELECT table_name
+                FROM information_schema.columns
+                WHERE table_schema = 'clinical'
+                  AND column_name = 'patient_key'
+                  AND table_name = ANY(:tables)
+            """),
+            {"tables": CLINICAL_TABLES}
+        )
+        present = {row[0] for row in result.fetchall()}
+        missing = [table for table in CLINICAL_TABLES if table not in present]
+        if missing:
+            logger.warning(f"Patient delete cascade skips missing clinical tables: {missing}")
+        _cascade_tables = [table for table in CLINICAL_TABLES if table in present]
+    return _cascade_tables
+
+
+async def delete_patients(
+    db: AsyncSession,
+    icns: List[str],
+    session_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Hard delete patients with cascading delete of all clinical data.
+    WARNING: This permanently removes the patients and ALL associated clinical records.
 
-        # First verify patient exists
-        check_query = text("""
-            SELECT icn FROM clinical.patient_demographics WHERE icn = :icn
-        """)
-        result = await db.execute(check_query, {"icn": icn})
-        if not result.fetchone():
-            logger.warning(f"Delete failed: Patient {icn} not found")
-            return {"success": False, "error": "Patient not found"}
+    All tables are cleared by one data-modifying CTE in one transaction,
+    so a batch of N patients is a single round trip. Clinical rows are only
+    removed for ICNs that exist in patient_demographics.
 
-        # Cascade delete from all clinical tables (using patient_key = icn)
-        # Use defensive approach: try each table but don't fail if table doesn't exist
-        clinical_tables = [
-            "patient_vitals",
-            "patient_flags",
-            "patient_flag_history",
-            "patient_allergies",
-            "patient_allergy_reactions",
-            "patient_medications_outpatient",
-            "patient_medications_inpatient",
-            "patient_encounters",
-            "patient_labs",
-            "patient_clinical_notes",
-            "patient_immunizations"
-        ]
-
-        deleted_counts = {}
-        for table in clinical_tables:
-            try:
-                delete_query = text(f"""
-                    DELETE FROM clinical.{table}
-                    WHERE patient_key = :patient_key
-                """)
-                result = await db.execute(delete_query, {"patient_key": icn})
-                deleted_counts[table] = result.rowcount
-            except Exception as table_error:
-                # Log but continue - table might not exist or have different structure
-                logger.warning(f"Could not delete from clinical.{table}: {table_error}")
-                deleted_counts[table] = f"error: {str(table_error)}"
-
-        # Finally, delete the patient demographics record
-        logger.info(f"Deleting patient demographics for {icn}")
-        delete_patient_query = text("""
-            DELETE FROM clinical.patient_demographics
-            WHERE icn = :icn
-        """)
-        result = await db.execute(delete_patient_query, {"icn": icn})
-        demographics_deleted = result.rowcount
+    Returns deleted and not_found ICNs plus per-table row counts.
+    """
+    keys = list(dict.fromkeys(icn for icn in icns if icn))
+    if not keys:
+        return {"success": False, "error": "No patients selected"}
 
-        logger.info(f"Demographics rows deleted: {demographics_deleted}")
-        logger.info(f"Committing transaction for patient delete: {icn}")
+    try:
+        logger.info(f"Starting delete operation for {len(keys)} patient(s)")
+
+        tables = await _get_cascade_tables(db)
+
+        # Lock the target demographics rows, then delete every table from that set
+        ctes = ["""
+            target AS (
+                SELECT icn FROM clinical.patient_demographics
+                WHERE icn = ANY(:keys)
+                FOR UPDATE
+            )"""]
+        for table in tables:
+            ctes.append(f"""
+            del_{table} AS (
+                DELETE FROM clinical.{table}
+                WHERE patient_key = ANY(ARRAY(SELECT icn FROM target))
+                RETURNING 1
+            )""")
+        ctes.append("""
+            del_demographics AS (
+                DELETE FROM clinical.patient_demographics
+                WHERE icn IN (SELECT icn FROM target)
+                RETURNING icn
+            )""")
+
+        counts = [f"(SELECT count(*) FROM del_{table}) AS {table}" for table in tables]
+        counts.append("ARRAY(SELECT icn FROM del_demographics) AS deleted_icns")
+
+        result = await db.execute(
+            text(f"WITH {','.join(ctes)}\nSELECT {', '.join(counts)}"),
+            {"keys": keys}
+        )
+        row = result.one()._mapping
         await db.commit()
+        await invalidation_bus.invalidate_patients(keys)
+        await invalidation_bus.note_session_write(session_id)
 
-        logger.info(f"✅ Patient deleted successfully: {icn} (cascade deleted: {deleted_counts})")
+        deleted = list(row["deleted_icns"] or [])
+        deleted_set = set(deleted)
+        not_found = [icn for icn in keys if icn not in deleted_set]
+        deleted_counts = {table: row[table] for table in tables}
+        deleted_counts["patient_demographics"] = len(deleted)
 
-        return {"success": True, "icn": icn, "cascade_deleted": deleted_counts}
+        logger.info(f"✅ Patients deleted: {len(deleted)} (not found: {len(not_found)}, cascade deleted: {deleted_counts})")
+
+        return {
+            "success": True,
+            "deleted": deleted,
+            "not_found": not_found,
+            "cascade_deleted": deleted_counts
+        }
 
     except Exception as e:
         await db.rollback()
-        logger.error(f"Error deleting patient {icn}: {e}")
+        logger.error(f"Error deleting patients {keys}: {e}")
         return {
             "success": False,
             "error": str(e)
         }
 
 
-async def get_patient_by_icn(db: AsyncSession, icn: str) -> Optional[Dict[str, Any]]:
+async def delete_patient(db: AsyncSession, icn: str, session_id: Optional[str] = None) -> Dict[str, Any]:
     """
-    Fetch single patient by ICN for edit form population.
+    Hard delete patient record with cascading delete of all clinical data.
+    WARNING: This permanently removes the patient and ALL associated clinical records.
+
+    Single-patient form of delete_patients (one statement, one transaction).
     """
-    try:
-        query = text("""
-            SELECT * FROM clinical.patient_demographics
-            WHERE icn = :icn
-        """)
+    result = await delete_patients(db, [icn], session_id)
+
+    if not result["success"]:
+        return result
+
+    if icn not in result["deleted"]:
+        logger.warning(f"Delete failed: Patient {icn} not found")
+        return {"success": False, "error": "Patient not found"}
 
-        result = await db.execute(query, {"icn": icn})
-        row = result.fetchone()
+    return {"success": True, "icn": icn, "cascade_deleted": result["cascade_deleted"]}
 
-        if not row:
-            return None
 
-        # Convert row to dict
-        return dict(row._mapping)
+async def get_patient_by_icn(db: AsyncSession, icn: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch single patient by ICN for edit form population
+    (served from the demographics cache).
+    """
+    try:
+        return await demographics_cache.load(db, icn)
 
     except Exception as e:
         logger.error(f"Error fetching patient {icn}: {e}")
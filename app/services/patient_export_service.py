@@ -0,0 +1,236 @@
+# -----------------------------------------------------------
+# app/services/patient_export_service.py
+# -----------------------------------------------------------
+# Streaming patient exports (CSV / NDJSON, optional gzip)
+# -----------------------------------------------------------
+
+from sqlalchemy import text
+from typing import Dict, Any, Optional, List, AsyncIterator, Sequence
+from datetime import date, datetime
+from decimal import Decimal
+import csv
+import io
+import json
+import logging
+import zlib
+
+from database import AsyncSessionLocal
+from app.services.patient_service import build_roster_filters
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows fetched per server-side cursor round trip (and per response chunk)
+EXPORT_PARTITION_ROWS = 1000
+
+# Exportable datasets. Column names are whitelisted here because they are
+# interpolated into SQL. Full SSN is deliberately not exportable.
+EXPORT_DATASETS: Dict[str, Dict[str, Any]] = {
+    "demographics": {
+        "table": "clinical.patient_demographics",
+        "key": "icn",
+        "order": "COALESCE(name_last, ''), COALESCE(name_first, ''), icn",
+        "columns": [
+            "icn", "name_last", "name_first", "name_display",
+            "dob", "age", "sex", "ssn_last4",
+            "primary_station", "primary_station_name",
+            "address_street1", "address_street2", "address_city", "address_state", "address_zip",
+            "phone_primary", "insurance_company_name",
+            "marital_status", "religion", "service_connected_percent",
+            "deceased_flag", "death_date",
+            "source_system", "last_updated",
+        ],
+        "default_columns": [
+            "icn", "name_display", "dob", "age", "sex", "ssn_last4", "primary_station",
+        ],
+    },
+    "vitals": {
+        "table": "clinical.patient_vitals",
+        "key": "patient_key",
+        "order": "taken_datetime DESC",
+        "columns": [
+            "vital_type", "vital_abbr", "taken_datetime", "result_value", "numeric_value",
+            "systolic", "diastolic", "unit_of_measure", "location_name", "abnormal_flag",
+        ],
+    },
+    "allergies": {
+        "table": "clinical.patient_allergies",
+        "key": "patient_key",
+        "order": "is_active DESC, severity_rank DESC, origination_date DESC",
+        "columns": [
+            "allergen_standardized", "allergen_type", "severity", "reactions",
+            "origination_date", "historical_or_observed", "is_active",
+        ],
+    },
+    "medications": {
+        "table": "clinical.patient_medications_outpatient",
+        "key": "patient_key",
+        "order": "issue_date DESC",
+        "columns": [
+            "drug_name_local", "generic_name", "drug_strength", "sig", "rx_status_computed",
+            "issue_date", "expiration_date", "refills_remaining", "provider_name", "is_active",
+        ],
+    },
+    "notes": {
+        "table": "clinical.patient_clinical_notes",
+        "key": "patient_key",
+        "order": "reference_datetime DESC",
+        "columns": [
+            "document_title", "document_class", "reference_datetime", "author_name",
+            "status", "text_preview", "source_system",
+        ],
+    },
+}
+
+# Chart export order for section=all (NDJSON only)
+CHART_SECTIONS = ["demographics", "vitals", "allergies", "medications", "notes"]
+
+
+def resolve_columns(dataset: str, requested: Optional[str]) -> List[str]:
+    """
+    Resolve a comma-separated column list against the dataset whitelist.
+    Blank means the dataset's default columns. Raises ValueError on
+    unknown columns.
+    """
+    spec = EXPORT_DATASETS[dataset]
+    if not requested or not requested.strip():
+        return list(spec.get("default_columns", spec["columns"]))
+
+    columns = [column.strip() for column in requested.split(",") if column.strip()]
+    unknown = [column for column in columns if column not in spec["columns"]]
+    if unknown:
+        raise ValueError(f"Unknown {dataset} column(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(columns))
+
+
+def export_filename(base: str, fmt: str, compress: bool) -> str:
+    """Download filename, e.g. patients.csv or ICN100001-chart.ndjson.gz."""
+    return f"{base}.{fmt}" + (".gz" if compress else "")
+
+
+def _plain(value: Any) -> Any:
+    """Convert database values to JSON/CSV-friendly scalars."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _encode_csv(rows: Sequence[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if value is None else _plain(value) for value in row])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(rows: Sequence[Sequence[Any]], columns: List[str], section: Optional[str]) -> bytes:
+    lines = []
+    for row in rows:
+        record = {"section": section} if section else {}
+        record.update((column, _plain(value)) for column, value in zip(columns, row))
+        lines.append(json.dumps(record))
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+async def stream_export(
+    fmt: str,
+    parts: List[Dict[str, Any]],
+    compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Stream one or more dataset queries as CSV or NDJSON bytes.
+
+    Each part is {"dataset", "columns", "where" (SQL conditions), "params",
+    "section" (NDJSON label, optional)}. Rows come from a server-side cursor
+    EXPORT_PARTITION_ROWS at a time, so memory stays flat regardless of
+    table size. Uses its own session: the response outlives the request's
+    dependencies.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+
+    def emit(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    rows_written = 0
+    async with AsyncSessionLocal() as db:
+        for part in parts:
+            spec = EXPORT_DATASETS[part["dataset"]]
+            columns = part["columns"]
+            where_sql = f"WHERE {' AND '.join(part['where'])}" if part["where"] else ""
+
+            query = text(f"""
+                SELECT {", ".join(columns)}
+                FROM {spec["table"]}
+                {where_sql}
+                ORDER BY {spec["order"]}
+            """).execution_options(yield_per=EXPORT_PARTITION_ROWS)
+
+            if fmt == "csv":
+                header = emit(_encode_csv([columns]))
+                if header:
+                    yield header
+
+            result = await db.stream(query, part["params"])
+            async for rows in result.partitions():
+                rows_written += len(rows)
+                if fmt == "csv":
+                    chunk = _encode_csv(rows)
+                else:
+                    chunk = _encode_ndjson(rows, columns, part.get("section"))
+                data = emit(chunk)
+                if data:
+                    yield data
+
+    if compressor:
+        yield compressor.flush()
+
+    logger.info(f"Export streamed {rows_written} rows ({fmt}{', gzip' if compress else ''})")
+
+
+def chart_parts(
+    icn: str,
+    patient_key: str,
+    sections: List[str],
+    columns: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Build stream_export parts for a patient's chart sections.
+    Demographics are filtered by icn, clinical sections by patient_key.
+    Column selection applies to a single-section export; a multi-section
+    export includes every whitelisted column and labels each record.
+    """
+    single = len(sections) == 1
+    parts = []
+    for section in sections:
+        spec = EXPORT_DATASETS[section]
+        parts.append({
+            "dataset": section,
+            "columns": resolve_columns(section, columns) if single else list(spec["columns"]),
+            "where": [f"{spec['key']} = :{spec['key']}"],
+            "params": {spec["key"]: icn if spec["key"] == "icn" else patient_key},
+            "section": None if single else section,
+        })
+    return parts
+
+
+def roster_parts(
+    columns: Optional[str] = None,
+    name: Optional[str] = None,
+    icn: Optional[str] = None,
+    ssn_last4: Optional[str] = None,
+    station: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Build the stream_export part for the (filtered) patient roster."""
+    conditions, params = build_roster_filters(name, icn, ssn_last4, station)
+    return [{
+        "dataset": "demographics",
+        "columns": resolve_columns("demographics", columns),
+        "where": conditions,
+        "params": params,
+    }]
@@ -0,0 +1,271 @@
+# -----------------------------------------------------------
+# app/services/patient_import_service.py
+# -----------------------------------------------------------
+# Streaming bulk patient import (CSV / NDJSON) via COPY
+# -----------------------------------------------------------
+
+from sqlalchemy import text
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Tuple
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import re
+import time
+
+from database import engine
+from app.services.invalidation_bus import invalidation_bus
+from app.services.patient_crud_service import (
+    PATIENT_COLUMNS,
+    ICN_SERIES_MIN,
+    ICN_SERIES_MAX,
+    IcnSeriesExhausted,
+    build_patient_row,
+    icn_allocator,
+    validate_patient_data,
+)
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Input fields accepted per record (anything else is ignored)
+IMPORT_FIELDS = (
+    "icn", "name_last", "name_first", "dob", "sex", "ssn", "ssn_last4",
+    "primary_station", "primary_station_name",
+    "address_street1", "address_street2", "address_city", "address_state", "address_zip",
+    "phone_primary", "insurance_company_name",
+    "marital_status", "religion", "service_connected_percent",
+    "deceased_flag", "death_date",
+)
+
+# Caller-supplied ICNs (e.g., synthetic test sites); the 999 series stays allocator-only
+ICN_PATTERN = re.compile(r"^ICN\d{6,10}$")
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> Optional[str]:
+    """Resolve the import format from an explicit choice or the file extension."""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in IMPORT_FORMATS else None
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def iter_records(lines: Iterable[bytes], fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Stream (line_number, record, parse_error) tuples from raw file lines.
+    Lines are decoded incrementally, so the file is never held in memory.
+    """
+    text_lines = codecs.iterdecode(lines, "utf-8-sig")
+
+    if fmt == "csv":
+        reader = csv.DictReader(text_lines)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(text_lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def _normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep known fields as stripped strings; blanks become None (as with form posts)."""
+    normalized = {}
+    for key, value in record.items():
+        key = (key or "").strip()
+        if key not in IMPORT_FIELDS:
+            continue
+        if value is not None:
+            value = str(value).strip() or None
+        normalized[key] = value
+    if normalized.get("icn"):
+        normalized["icn"] = normalized["icn"].upper()
+    return normalized
+
+
+def _read_batch(records: Iterator, batch_size: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]], int]:
+    """
+    Pull up to batch_size records and validate them.
+    Runs in a worker thread (file reads + validation are blocking).
+    Returns (valid [(line, data)], errors, records_read).
+    """
+    valid = []
+    errors = []
+    read = 0
+
+    for line_number, record, parse_error in records:
+        read += 1
+        if parse_error:
+            errors.append({"line": line_number, "icn": None, "errors": {"record": parse_error}})
+        else:
+            data = _normalize_record(record)
+            field_errors = validate_patient_data(data, is_create=True)
+
+            icn = data.get("icn")
+            if icn and not ICN_PATTERN.match(icn):
+                field_errors["icn"] = "ICN must be ICN followed by 6-10 digits"
+            elif icn and ICN_SERIES_MIN <= int(icn[3:]) <= ICN_SERIES_MAX:
+                field_errors["icn"] = "ICN999xxx is allocated by med-z4; leave icn blank"
+
+            if field_errors:
+                errors.append({"line": line_number, "icn": icn, "errors": field_errors})
+            else:
+                valid.append((line_number, data))
+
+        if read >= batch_size:
+            break
+
+    return valid, errors, read
+
+
+def _copy_payload(rows: List[Dict[str, Any]]) -> bytes:
+    """Encode rows as COPY CSV (None -> NULL; dates/timestamps as ISO strings)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            "" if row[column] is None else (
+                row[column].isoformat() if hasattr(row[column], "isoformat") else row[column]
+            )
+            for column in PATIENT_COLUMNS
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def _allocate_icns(count: int) -> List[str]:
+    """Allocate up to count ICNs; returns fewer if the 999 series runs out."""
+    try:
+        return await icn_allocator.allocate(count)
+    except IcnSeriesExhausted:
+        icns = []
+        for _ in range(count):
+            try:
+                icns.extend(await icn_allocator.allocate(1))
+            except IcnSeriesExhausted:
+                break
+        return icns
+
+
+async def import_patients(
+    lines: Iterable[bytes],
+    fmt: str,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    Stream patients from CSV or NDJSON lines into clinical.patient_demographics.
+
+    Records are validated with validate_patient_data in batches; each batch
+    is loaded with one asyncpg COPY in its own transaction. Records without
+    an icn get one from the 999-series allocator (reserved per batch);
+    records with an icn keep it and are checked for duplicates.
+
+    Returns counts plus a per-line error report (capped at MAX_REPORTED_ERRORS).
+    """
+    started = time.monotonic()
+    records = iter_records(lines, fmt)
+    seen_icns = set()
+    summary: Dict[str, Any] = {"total": 0, "imported": 0, "failed": 0, "batches": 0, "errors": []}
+
+    def report(errors: List[Dict[str, Any]]) -> None:
+        summary["failed"] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(summary["errors"])
+        if room > 0:
+            summary["errors"].extend(errors[:room])
+
+    async with engine.connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        asyncpg_connection = raw_connection.driver_connection
+
+        while True:
+            valid, errors, read = await asyncio.to_thread(_read_batch, records, batch_size)
+            if read == 0:
+                break
+            summary["total"] += read
+
+            # Duplicate caller-supplied ICNs: within the file, then against the database
+            supplied = [data["icn"] for _, data in valid if data.get("icn")]
+            existing = set()
+            if supplied:
+                result = await conn.execute(
+                    text("SELECT icn FROM clinical.patient_demographics WHERE icn = ANY(:icns)"),
+                    {"icns": supplied}
+                )
+                existing = {row[0] for row in result.fetchall()}
+
+            batch = []
+            for line_number, data in valid:
+                icn = data.get("icn")
+                if icn and (icn in existing or icn in seen_icns):
+                    errors.append({"line": line_number, "icn": icn, "errors": {"icn": "ICN already exists"}})
+                    continue
+                if icn:
+                    seen_icns.add(icn)
+                batch.append((line_number, data))
+
+            # Reserve 999-series ICNs for this batch in one allocator call
+            needs_icn = [entry for entry in batch if not entry[1].get("icn")]
+            allocated = await _allocate_icns(len(needs_icn)) if needs_icn else []
+            for (line_number, data), icn in zip(needs_icn, allocated):
+                data["icn"] = icn
+            for line_number, data in needs_icn[len(allocated):]:
+                errors.append({
+                    "line": line_number, "icn": None,
+                    "errors": {"icn": f"ICN 999 series exhausted (max: ICN{ICN_SERIES_MAX})"}
+                })
+            batch = [(line_number, data) for line_number, data in batch if data.get("icn")]
+
+            if batch:
+                rows = [build_patient_row(data, data["icn"]) for _, data in batch]
+                try:
+                    await asyncpg_connection.copy_to_table(
+                        "patient_demographics",
+                        schema_name="clinical",
+                        columns=PATIENT_COLUMNS,
+                        source=io.BytesIO(_copy_payload(rows)),
+                        format="csv"
+                    )
+                    await conn.commit()
+                    await invalidation_bus.invalidate_patients(row["icn"] for row in rows)
+                    summary["imported"] += len(rows)
+                except Exception as e:
+                    await conn.rollback()
+                    logger.error(f"Patient import batch {summary['batches'] + 1} failed: {e}")
+                    errors.extend(
+                        {"line": line_number, "icn": data["icn"], "errors": {"batch": f"COPY failed: {e}"}}
+                        for line_number, data in batch
+                    )
+
+            summary["batches"] += 1
+            errors.sort(key=lambda error: error["line"])
+            report(errors)
+
+    elapsed = time.monotonic() - started
+    summary["elapsed_seconds"] = round(elapsed, 2)
+    summary["rows_per_second"] = int(summary["total"] / elapsed) if elapsed > 0 else summary["total"]
+    summary["errors_truncated"] = summary["failed"] > len(summary["errors"])
+
+    logger.info(
+        f"Patient import ({fmt}): {summary['imported']} imported, {summary['failed']} failed "
+        f"of {summary['total']} in {summary['elapsed_seconds']}s"
+    )
+    return summary
@@ -6,50 +6,31 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Mapping, Tuple
+from datetime import datetime
+import asyncio
+import base64
+import json
 import logging
 
+from database import replica_router
+from app.services.demographics_cache import demographics_cache
+
 logger = logging.getLogger(__name__)
 
 
 async def get_patient_demographics(db: AsyncSession, icn: str) -> Optional[Dict[str, Any]]:
     """
-    Fetch patient demographics by ICN.
+    Fetch patient demographics by ICN (served from the demographics cache).
     Returns patient info dict or None if not found.
     """
-    query = text("""
-        SELECT
-            patient_key,
-            icn,
-            name_display,
-            name_first,
-            name_last,
-            dob,
-            age,
-            sex,
-            ssn_last4
-        FROM clinical.patient_demographics
-        WHERE icn = :icn
-    """)
-
-    result = await db.execute(query, {"icn": icn})
-    row = result.fetchone()
+    row = await demographics_cache.load(db, icn)
 
     if not row:
         logger.warning(f"Patient not found: {icn}")
         return None
 
-    return {
-        "patient_key": row[0],
-        "icn": row[1],
-        "name_display": row[2],
-        "name_first": row[3],
-        "name_last": row[4],
-        "dob": row[5].strftime("%Y-%m-%d") if row[5] else "N/A",
-        "age": row[6] if row[6] else "N/A",
-        "sex": row[7] if row[7] else "N/A",
-        "ssn_last4": row[8] if row[8] else "N/A",
-    }
+    return _format_demographics(row)
 
 
 async def get_patient_vitals(db: AsyncSession, patient_key: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -77,22 +58,7 @@ async def get_patient_vitals(db: AsyncSession, patient_key: str, limit: int = 10
 
     result = await db.execute(query, {"patient_key": patient_key, "limit": limit})
 
-    vitals = []
-    for row in result.fetchall():
-        vitals.append({
-            "vital_type": row[0],
-            "vital_abbr": row[1],
-            "taken_datetime": row[2].strftime("%Y-%m-%d %H:%M") if row[2] else "N/A",
-            "result_value": row[3] if row[3] else "N/A",
-            "numeric_value": float(row[4]) if row[4] else None,
-            "systolic": row[5],
-            "diastolic": row[6],
-            "unit_of_measure": row[7] if row[7] else "",
-            "location_name": row[8] if row[8] else "N/A",
-            "abnormal_flag": row[9] if row[9] else "NORMAL",
-        })
-
-    return vitals
+    return [_format_vital(row._mapping) for row in result.fetchall()]
 
 
 async def get_patient_allergies(db: AsyncSession, patient_key: str) -> List[Dict[str, Any]]:
@@ -116,18 +82,7 @@ async def get_patient_allergies(db: AsyncSession, patient_key: str) -> List[Dict
 
     result = await db.execute(query, {"patient_key": patient_key})
 
-    allergies = []
-    for row in result.fetchall():
-        allergies.append({
-            "allergen": row[0],
-            "type": row[1] if row[1] else "N/A",
-            "severity": row[2] if row[2] else "Unknown",
-            "reactions": row[3] if row[3] else "N/A",
-            "origination_date": row[4].strftime("%Y-%m-%d") if row[4] else "N/A",
-            "historical_or_observed": row[5] if row[5] else "N/A",
-        })
-
-    return allergies
+    return [_format_allergy(row._mapping) for row in result.fetchall()]
 
 
 async def get_patient_medications(db: AsyncSession, patient_key: str, limit: int = 20) -> List[Dict[str, Any]]:
@@ -155,21 +110,7 @@ async def get_patient_medications(db: AsyncSession, patient_key: str, limit: int
 
     result = await db.execute(query, {"patient_key": patient_key, "limit": limit})
 
-    medications = []
-    for row in result.fetchall():
-        medications.append({
-            "drug_name": row[0] if row[0] else "N/A",
-            "generic_name": row[1] if row[1] else "N/A",
-            "strength": row[2] if row[2] else "N/A",
-            "sig": row[3] if row[3] else "N/A",
-            "status": row[4] if row[4] else "N/A",
-            "issue_date": row[5].strftime("%Y-%m-%d") if row[5] else "N/A",
-            "expiration_date": row[6].strftime("%Y-%m-%d") if row[6] else "N/A",
-            "refills_remaining": row[7] if row[7] is not None else "N/A",
-            "provider": row[8] if row[8] else "N/A",
-        })
-
-    return medications
+    return [_format_medication(row._mapping) for row in result.fetchall()]
 
 async def get_patient_clinical_notes(db: AsyncSession, patient_key: str, limit: int = 10) -> List[Dict[str, Any]]:
     """
@@ -193,16 +134,410 @@ async def get_patient_clinical_notes(db: AsyncSession, patient_key: str, limit:
 
     result = await db.execute(query, {"patient_key": patient_key, "limit": limit})
 
-    notes = []
-    for row in result.fetchall():
-        notes.append({
-            "document_title": row[0] if row[0] else "N/A",
-            "document_class": row[1] if row[1] else "N/A",
-            "reference_datetime": row[2].strftime("%Y-%m-%d %H:%M") if row[2] else "N/A",
-            "author_name": row[3] if row[3] else "N/A",
-            "status": row[4] if row[4] else "N/A",
-            "text_preview": row[5] if row[5] else "N/A",
-            "source_system": row[6] if row[6] else "N/A",
-        })
-
-    return notes
\ No newline at end of file
+    return [_format_clinical_note(row._mapping) for row in result.fetchall()]
+
+
+async def _run_in_own_session(session_factory, query_fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """Run one read-only service query on its own pooled connection/session."""
+    async with session_factory() as db:
+        return await query_fn(db, *args)
+
+
+async def get_patient_clinical_sections(
+    patient_key: str,
+    session_id: Optional[str] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch vitals, allergies, medications and clinical notes concurrently.
+    An AsyncSession cannot run statements concurrently, so each query uses
+    its own session from the pool. Latency is that of the slowest query.
+    All four run on the read target replica_router picks for session_id.
+    Returns dict keyed by template variable name.
+    """
+    session_factory = replica_router.sessionmaker_for(session_id)
+    vitals, allergies, medications, clinical_notes = await asyncio.gather(
+        _run_in_own_session(session_factory, get_patient_vitals, patient_key),
+        _run_in_own_session(session_factory, get_patient_allergies, patient_key),
+        _run_in_own_session(session_factory, get_patient_medications, patient_key),
+        _run_in_own_session(session_factory, get_patient_clinical_notes, patient_key),
+    )
+
+    return {
+        "vitals": vitals,
+        "allergies": allergies,
+        "medications": medications,
+        "clinical_notes": clinical_notes,
+    }
+
+
+async def get_patient_chart(
+    db: AsyncSession,
+    icn: str,
+    vitals_limit: int = 10,
+    medications_limit: int = 20,
+    notes_limit: int = 10
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetch demographics, recent vitals, active allergies, active outpatient
+    medications and recent clinical notes in a single statement.
+    Each section is a LATERAL subquery aggregated with json_agg, so the whole
+    chart costs one network round trip (useful when the DB is across a WAN).
+    Returns dict with "patient" plus the section lists (same dicts as the
+    per-section functions), or None if the patient is not found.
+    """
+    query = text("""
+        SELECT
+            d.patient_key,
+            d.icn,
+            d.name_display,
+            d.name_first,
+            d.name_last,
+            d.dob,
+            d.age,
+            d.sex,
+            d.ssn_last4,
+            COALESCE(v.items, '[]'::json) AS vitals,
+            COALESCE(a.items, '[]'::json) AS allergies,
+            COALESCE(m.items, '[]'::json) AS medications,
+            COALESCE(n.items, '[]'::json) AS clinical_notes
+        FROM clinical.patient_demographics d
+        LEFT JOIN LATERAL (
+            SELECT json_agg(x ORDER BY x.taken_datetime DESC) AS items
+            FROM (
+                SELECT
+                    vital_type,
+                    vital_abbr,
+                    taken_datetime,
+                    result_value,
+                    numeric_value,
+                    systolic,
+                    diastolic,
+                    unit_of_measure,
+                    location_name,
+                    abnormal_flag
+                FROM clinical.patient_vitals
+                WHERE patient_key = d.patient_key
+                ORDER BY taken_datetime DESC
+                LIMIT :vitals_limit
+            ) x
+        ) v ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT json_agg(x ORDER BY x.severity_rank DESC, x.origination_date DESC) AS items
+            FROM (
+                SELECT
+                    allergen_standardized,
+                    allergen_type,
+                    severity,
+                    reactions,
+                    origination_date,
+                    historical_or_observed,
+                    severity_rank
+                FROM clinical.patient_allergies
+                WHERE patient_key = d.patient_key
+                  AND is_active = TRUE
+            ) x
+        ) a ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT json_agg(x ORDER BY x.issue_date DESC) AS items
+            FROM (
+                SELECT
+                    drug_name_local,
+                    generic_name,
+                    drug_strength,
+                    sig,
+                    rx_status_computed,
+                    issue_date,
+                    expiration_date,
+                    refills_remaining,
+                    provider_name
+                FROM clinical.patient_medications_outpatient
+                WHERE patient_key = d.patient_key
+                  AND is_active = TRUE
+                ORDER BY issue_date DESC
+                LIMIT :medications_limit
+            ) x
+        ) m ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT json_agg(x ORDER BY x.reference_datetime DESC) AS items
+            FROM (
+                SELECT
+                    document_title,
+                    document_class,
+                    reference_datetime,
+                    author_name,
+                    status,
+                    text_preview,
+                    source_system
+                FROM clinical.patient_clinical_notes
+                WHERE patient_key = d.patient_key
+                ORDER BY reference_datetime DESC
+                LIMIT :notes_limit
+            ) x
+        ) n ON TRUE
+        WHERE d.icn = :icn
+    """)
+
+    result = await db.execute(query, {
+        "icn": icn,
+        "vitals_limit": vitals_limit,
+        "medications_limit": medications_limit,
+        "notes_limit": notes_limit,
+    })
+    row = result.fetchone()
+
+    if not row:
+        logger.warning(f"Patient not found: {icn}")
+        return None
+
+    data = row._mapping
+
+    return {
+        "patient": _format_demographics(data),
+        "vitals": [_format_vital(item) for item in _json_list(data["vitals"])],
+        "allergies": [_format_allergy(item) for item in _json_list(data["allergies"])],
+        "medications": [_format_medication(item) for item in _json_list(data["medications"])],
+        "clinical_notes": [_format_clinical_note(item) for item in _json_list(data["clinical_notes"])],
+    }
+
+
+# Keyset sort key for the roster; COALESCE keeps NULL names orderable and
+# matches the expression index in db/ddl/create_patient_roster_indexes.sql
+ROSTER_SORT_KEY = "(COALESCE(name_last, ''), COALESCE(name_first, ''), icn)"
+ROSTER_MAX_PAGE_SIZE = 200
+
+
+async def get_patient_roster(
+    db: AsyncSession,
+    name: Optional[str] = None,
+    icn: Optional[str] = None,
+    ssn_last4: Optional[str] = None,
+    station: Optional[str] = None,
+    cursor: Optional[str] = None,
+    direction: str = "next",
+    page_size: int = 50
+) -> Dict[str, Any]:
+    """
+    Fetch one page of the patient roster using keyset pagination on
+    (name_last, name_first, icn), so page N costs the same as page 1.
+
+    Filters:
+        name: last-name prefix, or "LAST, FIRST" prefixes
+        icn: ICN prefix
+        ssn_last4: exact match
+        station: exact primary_station match
+
+    Args:
+        cursor: opaque cursor from a previous page (next_cursor/prev_cursor)
+        direction: "next" (rows after cursor) or "prev" (rows before cursor)
+
+    Returns dict with patients (row dicts), next_cursor, prev_cursor,
+    has_next and has_prev.
+    """
+    page_size = max(1, min(page_size, ROSTER_MAX_PAGE_SIZE))
+    forward = direction != "prev"
+
+    conditions, params = build_roster_filters(name, icn, ssn_last4, station)
+    params["limit"] = page_size + 1
+
+    position = _decode_roster_cursor(cursor) if cursor else None
+    if position:
+        comparison = ">" if forward else "<"
+        conditions.append(f"{ROSTER_SORT_KEY} {comparison} (:cursor_last, :cursor_first, :cursor_icn)")
+        params["cursor_last"], params["cursor_first"], params["cursor_icn"] = position
+
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = "ASC" if forward else "DESC"
+
+    query = text(f"""
+        SELECT
+            patient_key,
+            icn,
+            name_display,
+            name_last,
+            name_first,
+            dob,
+            age,
+            sex,
+            ssn_last4,
+            primary_station
+        FROM clinical.patient_demographics
+        {where_sql}
+        ORDER BY COALESCE(name_last, '') {order}, COALESCE(name_first, '') {order}, icn {order}
+        LIMIT :limit
+    """)
+
+    result = await db.execute(query, params)
+    patients = [dict(row._mapping) for row in result.fetchall()]
+
+    has_more = len(patients) > page_size
+    patients = patients[:page_size]
+
+    if not forward:
+        # Fetched backwards from the cursor; restore display order
+        patients.reverse()
+
+    has_next = has_more if forward else position is not None
+    has_prev = (position is not None) if forward else has_more
+
+    return {
+        "patients": patients,
+        "next_cursor": _encode_roster_cursor(patients[-1]) if patients and has_next else None,
+        "prev_cursor": _encode_roster_cursor(patients[0]) if patients and has_prev else None,
+        "has_next": has_next,
+        "has_prev": has_prev,
+    }
+
+
+def build_roster_filters(
+    name: Optional[str] = None,
+    icn: Optional[str] = None,
+    ssn_last4: Optional[str] = None,
+    station: Optional[str] = None
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Build WHERE conditions and bind params for the roster filters
+    (shared by get_patient_roster and the roster export).
+    """
+    conditions: List[str] = []
+    params: Dict[str, Any] = {}
+
+    if name and name.strip():
+        last, _, first = name.partition(",")
+        if last.strip():
+            conditions.append("upper(name_last) LIKE :name_last_prefix")
+            params["name_last_prefix"] = _like_prefix(last.strip().upper())
+        if first.strip():
+            conditions.append("upper(name_first) LIKE :name_first_prefix")
+            params["name_first_prefix"] = _like_prefix(first.strip().upper())
+
+    if icn and icn.strip():
+        conditions.append("icn LIKE :icn_prefix")
+        params["icn_prefix"] = _like_prefix(icn.strip().upper())
+
+    if ssn_last4 and ssn_last4.strip():
+        conditions.append("ssn_last4 = :ssn_last4")
+        params["ssn_last4"] = ssn_last4.strip()
+
+    if station and station.strip():
+        conditions.append("primary_station = :station")
+        params["station"] = station.strip()
+
+    return conditions, params
+
+
+def _like_prefix(value: str) -> str:
+    """Escape LIKE wildcards in user input and append a trailing %."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _encode_roster_cursor(row: Mapping[str, Any]) -> str:
+    """Opaque, URL-safe cursor for a roster row's sort key."""
+    key = [row["name_last"] or "", row["name_first"] or "", row["icn"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def _decode_roster_cursor(cursor: str) -> Optional[List[str]]:
+    """Decode a roster cursor; invalid cursors restart from the first page."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(key, list) and len(key) == 3 and all(isinstance(k, str) for k in key):
+            return key
+    except (ValueError, TypeError):
+        pass
+    logger.warning("Ignoring invalid roster cursor")
+    return None
+
+
+# -----------------------------------------------------------
+# Helper functions (row -> template dict)
+# -----------------------------------------------------------
+# Rows come either from SQLAlchemy (row._mapping, native types) or from
+# json_agg in get_patient_chart (timestamps as ISO strings).
+
+def _json_list(value: Any) -> List[Dict[str, Any]]:
+    """Decode a json column (asyncpg returns json as text without a type hint)."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """Accept a datetime/date or an ISO string from json_agg."""
+    if isinstance(value, str):
+        # Keep 'YYYY-MM-DDTHH:MM:SS': Postgres trims fractional seconds to
+        # variable length, which Python 3.10 fromisoformat() rejects
+        return datetime.fromisoformat(value[:19])
+    return value
+
+
+def _format_date(value: Any, fmt: str) -> str:
+    value = _as_datetime(value)
+    return value.strftime(fmt) if value else "N/A"
+
+
+def _format_demographics(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "patient_key": row["patient_key"],
+        "icn": row["icn"],
+        "name_display": row["name_display"],
+        "name_first": row["name_first"],
+        "name_last": row["name_last"],
+        "dob": _format_date(row["dob"], "%Y-%m-%d"),
+        "age": row["age"] if row["age"] else "N/A",
+        "sex": row["sex"] if row["sex"] else "N/A",
+        "ssn_last4": row["ssn_last4"] if row["ssn_last4"] else "N/A",
+    }
+
+
+def _format_vital(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "vital_type": row["vital_type"],
+        "vital_abbr": row["vital_abbr"],
+        "taken_datetime": _format_date(row["taken_datetime"], "%Y-%m-%d %H:%M"),
+        "result_value": row["result_value"] if row["result_value"] else "N/A",
+        "numeric_value": float(row["numeric_value"]) if row["numeric_value"] else None,
+        "systolic": row["systolic"],
+        "diastolic": row["diastolic"],
+        "unit_of_measure": row["unit_of_measure"] if row["unit_of_measure"] else "",
+        "location_name": row["location_name"] if row["location_name"] else "N/A",
+        "abnormal_flag": row["abnormal_flag"] if row["abnormal_flag"] else "NORMAL",
+    }
+
+
+def _format_allergy(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "allergen": row["allergen_standardized"],
+        "type": row["allergen_type"] if row["allergen_type"] else "N/A",
+        "severity": row["severity"] if row["severity"] else "Unknown",
+        "reactions": row["reactions"] if row["reactions"] else "N/A",
+        "origination_date": _format_date(row["origination_date"], "%Y-%m-%d"),
+        "historical_or_observed": row["historical_or_observed"] if row["historical_or_observed"] else "N/A",
+    }
+
+
+def _format_medication(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "drug_name": row["drug_name_local"] if row["drug_name_local"] else "N/A",
+        "generic_name": row["generic_name"] if row["generic_name"] else "N/A",
+        "strength": row["drug_strength"] if row["drug_strength"] else "N/A",
+        "sig": row["sig"] if row["sig"] else "N/A",
+        "status": row["rx_status_computed"] if row["rx_status_computed"] else "N/A",
+        "issue_date": _format_date(row["issue_date"], "%Y-%m-%d"),
+        "expiration_date": _format_date(row["expiration_date"], "%Y-%m-%d"),
+        "refills_remaining": row["refills_remaining"] if row["refills_remaining"] is not None else "N/A",
+        "provider": row["provider_name"] if row["provider_name"] else "N/A",
+    }
+
+
+def _format_clinical_note(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "document_title": row["document_title"] if row["document_title"] else "N/A",
+        "document_class": row["document_class"] if row["document_class"] else "N/A",
+        "reference_datetime": _format_date(row["reference_datetime"], "%Y-%m-%d %H:%M"),
+        "author_name": row["author_name"] if row["author_name"] else "N/A",
+        "status": row["status"] if row["status"] else "N/A",
+        "text_preview": row["text_preview"] if row["text_preview"] else "N/A",
+        "source_system": row["source_system"] if row["source_system"] else "N/A",
+    }
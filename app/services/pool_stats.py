@@ -0,0 +1,105 @@
+# -----------------------------------------------------------
+# app/services/pool_stats.py
+# -----------------------------------------------------------
+# Connection pool instrumentation: checkout wait times,
+# timeouts and live pool occupancy
+# -----------------------------------------------------------
+
+import time
+from typing import Dict, Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.services.metrics import registry
+
+# Checkout waits are normally sub-millisecond; the upper buckets show pool starvation
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "medz4_db_pool_checkout_seconds",
+    "Time to obtain a pooled connection by pool (queue wait, new connection and pre-ping).",
+    ("pool",), buckets=WAIT_BUCKETS)
+POOL_TIMEOUTS = registry.counter(
+    "medz4_db_pool_timeouts_total", "Checkouts that gave up after POSTGRES_POOL_TIMEOUT_SECONDS, by pool.",
+    ("pool",))
+
+# Pool name used when an engine was created without pool_logging_name
+PRIMARY_POOL = "primary"
+
+
+class PoolStats:
+    """
+    Checkout counters for one named pool. Kept by name rather than on the
+    pool object, because engine.dispose() recreates the pool (the
+    pool_logging_name carries over).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_total += waited
+        if waited > self.wait_max:
+            self.wait_max = waited
+        POOL_CHECKOUT_WAIT.observe(waited, self.name)
+
+    def record_timeout(self) -> None:
+        self.timeouts += 1
+        POOL_TIMEOUTS.inc(self.name)
+
+
+# Pool name (primary, or a replica host) -> its checkout counters
+_pool_stats: Dict[str, PoolStats] = {}
+
+
+def pool_stats_for(pool) -> PoolStats:
+    """Checkout counters for this pool's engine (one set per primary/replica)."""
+    name = pool.logging_name or PRIMARY_POOL
+    stats = _pool_stats.get(name)
+    if stats is None:
+        stats = _pool_stats[name] = PoolStats(name)
+    return stats
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times every checkout."""
+
+    def connect(self):
+        stats = pool_stats_for(self)
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            stats.record_timeout()
+            raise
+        stats.record(time.perf_counter() - started)
+        return connection
+
+
+def get_pool_status(pool) -> Dict[str, Any]:
+    """Return live occupancy plus checkout wait statistics for an engine's pool."""
+    size = pool.size()
+    overflow = max(0, pool.overflow())  # QueuePool counts overflow from -size
+    pool_stats = pool_stats_for(pool)
+    checkouts = pool_stats.checkouts
+    return {
+        "name": pool_stats.name,
+        "size": size,
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+        "recycle_seconds": pool._recycle,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": overflow,
+        "capacity": size + max(0, pool._max_overflow),
+        "checkouts": checkouts,
+        "timeouts": pool_stats.timeouts,
+        "wait_avg_ms": round(pool_stats.wait_total * 1000 / checkouts, 2) if checkouts else 0.0,
+        "wait_max_ms": round(pool_stats.wait_max * 1000, 1),
+    }
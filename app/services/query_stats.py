@@ -0,0 +1,180 @@
+# -----------------------------------------------------------
+# app/services/query_stats.py
+# -----------------------------------------------------------
+# Per-statement SQL timing keyed by normalized fingerprint,
+# plus the slow-query log (bound parameters redacted)
+# -----------------------------------------------------------
+
+import re
+import hashlib
+import logging
+from typing import Dict, Any, List, Tuple
+
+from app.services.metrics import DB_QUERY_LATENCY
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Separate logger so the slow-query log can be routed or silenced on its own
+slow_logger = logging.getLogger(f"{__name__}.slow")
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+# A parenthesized row (one level of nested parens, e.g. CAST(? AS uuid)),
+# repeated: "(r), (r), (r)" -> "(r)+". After VALUES a single row counts too,
+# so batched VALUES statements share one fingerprint whatever the batch size.
+_ROW = r"\(((?:[^()]|\([^()]*\))*)\)"
+_VALUES_ROWS = re.compile(r"\bVALUES\s*" + _ROW + r"(?:\s*,\s*\(\1\))*", re.IGNORECASE)
+_ROWS = re.compile(_ROW + r"(?:\s*,\s*\(\1\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Statement text -> (fingerprint id, normalized text). Application SQL is a
+# small fixed set, so this is nearly always a single dict hit.
+_FINGERPRINT_CACHE_MAX = 2048
+_fingerprint_cache: Dict[str, Tuple[str, str]] = {}
+
+# Fingerprint id used once max_statements distinct statements are tracked
+OTHER = "other"
+
+
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """
+    Normalize a SQL statement: literals and bind placeholders become ?,
+    IN lists collapse to (?+) and repeated row tuples (VALUES rows, row
+    IN lists) to (row)+, comments and whitespace are removed.
+    Returns (12-char id, normalized text). The normalized text carries no
+    literal values, so it is safe to log and display.
+    """
+    cached = _fingerprint_cache.get(statement)
+    if cached is not None:
+        return cached
+
+    normalized = _COMMENTS.sub(" ", statement)
+    normalized = _STRINGS.sub("?", normalized)
+    normalized = _PLACEHOLDERS.sub("?", normalized)
+    normalized = _NUMBERS.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()  # Rows compare equal only once spacing matches
+    normalized = _LISTS.sub("(?+)", normalized)
+    normalized = _VALUES_ROWS.sub(r"VALUES (\1)+", normalized)
+    normalized = _ROWS.sub(r"(\1)+", normalized)
+    result = (hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12], normalized)
+
+    if len(_fingerprint_cache) >= _FINGERPRINT_CACHE_MAX:
+        _fingerprint_cache.clear()
+    _fingerprint_cache[statement] = result
+    return result
+
+
+def _redact_value(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> str:
+    """
+    Describe bound parameters by type and length only. Values may hold
+    PHI (names, SSNs, ICNs, dates of birth) and never reach the log.
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = redact_parameters(parameters[0]) if parameters else "[]"
+        return f"{len(parameters)} rows x {first}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {_redact_value(value)}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "[" + ", ".join(_redact_value(value) for value in parameters) + "]"
+    return _redact_value(parameters)
+
+
+class QueryStats:
+    """
+    Aggregates statement timings from the engine's cursor events.
+
+    Each statement is reduced to a fingerprint, so the same query with
+    different parameters is one entry. Timings feed the labelled
+    medz4_db_query_duration_seconds histogram on /metrics and the
+    /monitoring/queries top-N table. Statements at or over slow_query_ms
+    are logged with their fingerprint and redacted parameters.
+    """
+
+    def __init__(self, slow_query_ms: float, max_statements: int):
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        # fingerprint id -> {"statement", "calls", "total", "max", "slow"}
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self.slow_queries = 0
+
+    def record(self, statement: str, parameters: Any, elapsed: float, executemany: bool = False) -> None:
+        """Record one cursor execution (called from after_cursor_execute)."""
+        fp_id, normalized = fingerprint(statement)
+
+        entry = self._statements.get(fp_id)
+        if entry is None:
+            if len(self._statements) >= self.max_statements:
+                fp_id, normalized = OTHER, "(statements beyond POSTGRES_QUERY_STATS_MAX_STATEMENTS)"
+                entry = self._statements.get(OTHER)
+            if entry is None:
+                entry = self._statements[fp_id] = {
+                    "statement": normalized, "calls": 0, "total": 0.0, "max": 0.0, "slow": 0,
+                }
+
+        entry["calls"] += 1
+        entry["total"] += elapsed
+        if elapsed > entry["max"]:
+            entry["max"] = elapsed
+        DB_QUERY_LATENCY.observe(elapsed, fp_id)
+
+        elapsed_ms = elapsed * 1000
+        if self.slow_query_ms > 0 and elapsed_ms >= self.slow_query_ms:
+            entry["slow"] += 1
+            self.slow_queries += 1
+            slow_logger.warning(
+                f"Slow query {elapsed_ms:.1f} ms [{fp_id}] {normalized} "
+                f"params={redact_parameters(parameters, executemany)}"
+            )
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the top statements by total execution time."""
+        entries = sorted(self._statements.items(), key=lambda item: item[1]["total"], reverse=True)
+        grand_total = sum(entry["total"] for _, entry in entries) or 1.0
+        return [
+            {
+                "id": fp_id,
+                "statement": entry["statement"],
+                "calls": entry["calls"],
+                "total_ms": round(entry["total"] * 1000, 1),
+                "mean_ms": round(entry["total"] * 1000 / entry["calls"], 2),
+                "max_ms": round(entry["max"] * 1000, 1),
+                "slow": entry["slow"],
+                "percent": round(entry["total"] * 100 / grand_total, 1),
+            }
+            for fp_id, entry in entries[:limit]
+        ]
+
+    def reset(self) -> None:
+        """Forget accumulated statement totals (the /metrics histogram is unaffected)."""
+        self._statements.clear()
+        self.slow_queries = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return summary counters for monitoring."""
+        return {
+            "statements": len(self._statements),
+            "max_statements": self.max_statements,
+            "calls": sum(entry["calls"] for entry in self._statements.values()),
+            "total_ms": round(sum(entry["total"] for entry in self._statements.values()) * 1000, 1),
+            "slow_queries": self.slow_queries,
+            "slow_query_ms": self.slow_query_ms,
+        }
+
+
+# Singleton instance
+query_stats = QueryStats(
+    slow_query_ms=settings.postgres.slow_query_ms,
+    max_statements=settings.postgres.query_stats_max_statements,
+)
@@ -0,0 +1,219 @@
+# -----------------------------------------------------------
+# app/services/replica_router.py
+# -----------------------------------------------------------
+# Read-replica selection for get_read_db: round-robin or
+# least-connections, replica-lag aware, read-your-writes
+# -----------------------------------------------------------
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ROUTING_STRATEGIES = ("round_robin", "least_connections")
+
+# Seconds behind the primary. A fully caught-up standby reports 0 even when
+# the primary has been idle (replay timestamp alone would keep growing).
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+READ_ROUTES = registry.counter(
+    "medz4_db_read_routes_total",
+    "get_read_db sessions by target (replica name or primary) and reason.",
+    ("target", "reason"))
+
+
+class _Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+        # Set by check_replicas; no lag reading yet means not in rotation
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.lagging = False
+        self.last_error: Optional[str] = None
+
+    def checked_out(self) -> int:
+        return self.engine.pool.checkedout()
+
+
+class ReplicaRouter:
+    """
+    Chooses where a read-only request runs.
+
+    Reads go to a replica that is reachable and no more than max_lag_seconds
+    behind, picked round-robin or by fewest checked-out connections. They
+    fall back to the primary when no replica qualifies, and for any session
+    that wrote within read_your_writes_seconds (mark_write), so clinicians
+    always see their own edits. Lag is polled by a background task.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Tuple[str, AsyncEngine]],
+        primary_sessionmaker: async_sessionmaker,
+        strategy: str,
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+        read_your_writes_seconds: float,
+    ):
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown replica routing strategy: {strategy} (use {', '.join(ROUTING_STRATEGIES)})")
+        self.replicas = [_Replica(name, engine) for name, engine in replicas]
+        self.primary_sessionmaker = primary_sessionmaker
+        self.strategy = strategy
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._round_robin = itertools.count()
+        self._writes: Dict[str, float] = {}  # session_id -> monotonic deadline
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # -------------------------------------------------------
+    # Routing
+    # -------------------------------------------------------
+
+    def sessionmaker_for(self, session_id: Optional[str]) -> async_sessionmaker:
+        """Return the session factory a read-only request should use."""
+        if not self.replicas:
+            return self.primary_sessionmaker
+
+        if session_id and self.recently_wrote(session_id):
+            READ_ROUTES.inc("primary", "read_your_writes")
+            return self.primary_sessionmaker
+
+        eligible = [
+            replica for replica in self.replicas
+            if replica.healthy and replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds
+        ]
+        if not eligible:
+            READ_ROUTES.inc("primary", "no_replica")
+            return self.primary_sessionmaker
+
+        if self.strategy == "least_connections":
+            replica = min(eligible, key=lambda candidate: candidate.checked_out())
+        else:
+            replica = eligible[next(self._round_robin) % len(eligible)]
+
+        READ_ROUTES.inc(replica.name, self.strategy)
+        return replica.sessionmaker
+
+    def mark_write(self, session_id: Optional[str]) -> None:
+        """Route this session's reads to the primary for read_your_writes_seconds."""
+        if not session_id or not self.replicas:
+            return
+        now = time.monotonic()
+        self._writes[session_id] = now + self.read_your_writes_seconds
+
+        # Keep the marker table bounded by dropping expired entries
+        if len(self._writes) > 10000:
+            self._writes = {key: deadline for key, deadline in self._writes.items() if deadline > now}
+
+    def recently_wrote(self, session_id: str) -> bool:
+        deadline = self._writes.get(session_id)
+        if deadline is None:
+            return False
+        if deadline < time.monotonic():
+            self._writes.pop(session_id, None)
+            return False
+        return True
+
+    # -------------------------------------------------------
+    # Lag monitoring
+    # -------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start polling replica lag (called from application startup)."""
+        if not self.replicas or (self._task is not None and not self._task.done()):
+            return
+        await self.check_replicas()
+        self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        """Stop polling and close replica pools (called on shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval_seconds)
+            await self.check_replicas()
+
+    async def check_replicas(self) -> None:
+        """Measure every replica's lag; unreachable replicas are taken out of rotation."""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    lag = await asyncio.wait_for(conn.scalar(LAG_QUERY), timeout=self.check_interval_seconds)
+                replica.lag_seconds = float(lag)
+                replica.last_error = None
+                if not replica.healthy:
+                    logger.info(f"Read replica {replica.name} is back in rotation")
+                replica.healthy = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if replica.healthy:
+                    logger.warning(f"Read replica {replica.name} unavailable: {e}")
+                replica.healthy = False
+                replica.lag_seconds = None
+                replica.last_error = str(e)
+                continue
+
+            lagging = replica.lag_seconds > self.max_lag_seconds
+            if lagging and not replica.lagging:
+                logger.warning(f"Read replica {replica.name} is {replica.lag_seconds:.1f}s behind; reading from primary")
+            replica.lagging = lagging
+
+    def stats(self) -> Dict[str, Any]:
+        """Return routing configuration and per-replica state for monitoring."""
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "strategy": self.strategy,
+            "max_lag_seconds": self.max_lag_seconds,
+            "read_your_writes_seconds": self.read_your_writes_seconds,
+            "recent_writers": sum(1 for deadline in self._writes.values() if deadline > now),
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": None if replica.lag_seconds is None else round(replica.lag_seconds, 2),
+                    "in_rotation": replica.healthy and replica.lag_seconds is not None
+                                   and replica.lag_seconds <= self.max_lag_seconds,
+                    "checked_out": replica.checked_out(),
+                    "error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+        }
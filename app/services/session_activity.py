@@ -0,0 +1,137 @@
+# -----------------------------------------------------------
+# app/services/session_activity.py
+# -----------------------------------------------------------
+# Write-behind tracker for auth.sessions.last_activity_at
+# -----------------------------------------------------------
+
+import asyncio
+import uuid
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from sqlalchemy import text
+
+from database import AsyncSessionLocal
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityTracker:
+    """
+    Collects touched session IDs in memory and periodically flushes them
+    to auth.sessions as one bulk UPDATE ... FROM (VALUES ...).
+
+    Write volume then scales with the number of active sessions per flush
+    interval instead of with the number of requests.
+    """
+
+    # Rows per UPDATE statement (keeps bind parameter count well below limits)
+    BATCH_SIZE = 1000
+
+    def __init__(self, flush_interval_seconds: float):
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: Dict[uuid.UUID, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def touch(self, session_id: uuid.UUID) -> None:
+        """Record activity for a session (no database access)."""
+        self._pending[session_id] = datetime.utcnow()
+
+    async def flush(self) -> int:
+        """
+        Write all pending activity timestamps to the database.
+        Returns the number of session rows updated.
+        """
+        if not self._pending:
+            return 0
+
+        # Swap the buffer so touches during the flush land in a fresh dict
+        pending, self._pending = self._pending, {}
+        items = list(pending.items())
+        updated = 0
+
+        try:
+            async with AsyncSessionLocal() as db:
+                for start in range(0, len(items), self.BATCH_SIZE):
+                    batch = items[start:start + self.BATCH_SIZE]
+
+                    values_sql = ", ".join(
+                        f"(CAST(:sid{i} AS uuid), CAST(:ts{i} AS timestamp))"
+                        for i in range(len(batch))
+                    )
+                    params: Dict[str, Any] = {}
+                    for i, (session_id, touched_at) in enumerate(batch):
+                        params[f"sid{i}"] = session_id
+                        params[f"ts{i}"] = touched_at
+
+                    result = await db.execute(
+                        text(f"""
+                            UPDATE auth.sessions AS s
+                            SET last_activity_at = v.last_activity_at
+                            FROM (VALUES {values_sql}) AS v(session_id, last_activity_at)
+                            WHERE s.session_id = v.session_id
+                              AND (s.last_activity_at IS NULL OR s.last_activity_at < v.last_activity_at)
+                        """),
+                        params
+                    )
+                    updated += result.rowcount
+
+                await db.commit()
+
+        except Exception as e:
+            # Put the timestamps back (keeping any newer touches) so they are retried
+            for session_id, touched_at in pending.items():
+                current = self._pending.get(session_id)
+                if current is None or current < touched_at:
+                    self._pending[session_id] = touched_at
+            logger.error(f"Session activity flush failed: {e}")
+            return 0
+
+        self.flushes += 1
+        self.rows_written += updated
+        logger.debug(f"Session activity flushed: {len(items)} sessions, {updated} rows updated")
+        return updated
+
+    async def _run(self) -> None:
+        """Background loop: flush every flush_interval_seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush task (call from application startup)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Session activity tracker started (flush every {self.flush_interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and flush anything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        logger.info("Session activity tracker stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pending/flush counters for monitoring."""
+        return {
+            "pending": len(self._pending),
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
+
+
+# Singleton instance
+activity_tracker = SessionActivityTracker(
+    flush_interval_seconds=settings.session.activity_flush_seconds,
+)
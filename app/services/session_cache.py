@@ -0,0 +1,104 @@
+# -----------------------------------------------------------
+# app/services/session_cache.py
+# -----------------------------------------------------------
+# In-process cache of validated sessions (bounded TTL/LRU)
+# -----------------------------------------------------------
+
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionCache:
+    """
+    Bounded TTL/LRU cache of validated sessions, keyed by session UUID string.
+
+    Each entry holds the user_info dict returned by validate_session() plus
+    the session's own expires_at, so an entry is never served past either
+    the cache TTL or the session expiry. Entries are evicted immediately on
+    logout (invalidate_session) and on expiry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return cached user_info for a session, or None on miss.
+        Expired entries (cache TTL or session expires_at) are evicted.
+        """
+        entry = self._entries.get(session_id)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry["cached_until"] < time.monotonic() or entry["expires_at"] < datetime.utcnow():
+            self._entries.pop(session_id, None)
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        # Mark as most recently used
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return entry["user_info"]
+
+    def put(self, session_id: str, user_info: Dict[str, Any], expires_at: datetime) -> None:
+        """Cache user_info for a validated session."""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        self._entries[session_id] = {
+            "user_info": user_info,
+            "expires_at": expires_at,
+            "cached_until": time.monotonic() + self.ttl_seconds,
+        }
+        self._entries.move_to_end(session_id)
+
+        # Evict least recently used entries beyond capacity
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def evict(self, session_id: str) -> None:
+        """Remove a session from the cache (logout, expiry, invalidation)."""
+        if self._entries.pop(session_id, None) is not None:
+            self.evictions += 1
+            logger.debug(f"Session cache evicted: {session_id}")
+
+    def clear(self) -> None:
+        """Remove all cached sessions."""
+        self.evictions += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+session_cache = SessionCache(
+    max_entries=settings.session.cache_max_entries,
+    ttl_seconds=settings.session.cache_ttl_seconds,
+)
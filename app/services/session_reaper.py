@@ -0,0 +1,233 @@
+# -----------------------------------------------------------
+# app/services/session_reaper.py
+# -----------------------------------------------------------
+# Background cleanup of auth.sessions: deactivates expired
+# sessions and optionally archives old inactive rows
+# -----------------------------------------------------------
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from sqlalchemy import text
+
+from database import AsyncSessionLocal
+from app.services.audit_log import audit_log
+from app.services.invalidation_bus import invalidation_bus
+from app.services.metrics import registry
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_REAPED = registry.counter(
+    "medz4_sessions_reaped_total", "auth.sessions rows handled by the reaper (expired, archived).",
+    ("action",))
+
+# One bounded batch of expired sessions. SKIP LOCKED lets every worker run
+# the reaper without blocking each other or a concurrent logout.
+# Uses idx_sessions_active_expires (db/ddl/create_session_indexes.sql).
+EXPIRE_BATCH = text("""
+    WITH expired AS (
+        SELECT session_id
+        FROM auth.sessions
+        WHERE is_active = TRUE
+          AND expires_at < :now
+        ORDER BY expires_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE auth.sessions AS s
+    SET is_active = FALSE
+    FROM expired
+    WHERE s.session_id = expired.session_id
+    RETURNING s.session_id, s.user_id
+""")
+
+# Moves one bounded batch of old inactive sessions to auth.sessions_archive
+# (db/ddl/create_sessions_archive.sql) in a single statement.
+ARCHIVE_BATCH = text("""
+    WITH moved AS (
+        DELETE FROM auth.sessions
+        WHERE session_id IN (
+            SELECT session_id
+            FROM auth.sessions
+            WHERE is_active = FALSE
+              AND expires_at < :cutoff
+            ORDER BY expires_at
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING session_id, user_id, created_at, last_activity_at, expires_at, ip_address, user_agent
+    )
+    INSERT INTO auth.sessions_archive
+        (session_id, user_id, created_at, last_activity_at, expires_at, ip_address, user_agent)
+    SELECT session_id, user_id, created_at, last_activity_at, expires_at, ip_address, user_agent
+    FROM moved
+    ON CONFLICT (session_id) DO NOTHING
+""")
+
+
+class SessionReaper:
+    """
+    Periodically marks expired sessions inactive so auth.sessions only
+    holds live rows under is_active = TRUE (validate_session otherwise only
+    notices expiry when the cookie comes back, which it often never does).
+
+    Each run works in batches of batch_size rows, one short transaction per
+    batch, and stops after max_batches so a large backlog is cleared over
+    several runs instead of in one long lock-holding sweep. Reaped sessions
+    are evicted from every worker's session cache and audited as
+    session_expired, exactly like the on-request expiry path.
+
+    With archive_after_days > 0, inactive sessions that expired more than
+    that many days ago are moved to auth.sessions_archive.
+    """
+
+    def __init__(self, interval_seconds: float, batch_size: int, max_batches: int,
+                 archive_after_days: int = 0):
+        self.interval_seconds = interval_seconds
+        self.batch_size = max(1, batch_size)
+        self.max_batches = max(1, max_batches)
+        self.archive_after_days = archive_after_days
+        self._task: Optional[asyncio.Task] = None
+        self._archive_table: Optional[bool] = None  # auth.sessions_archive exists
+        self.runs = 0
+        self.expired = 0
+        self.archived = 0
+        self.errors = 0
+        self.last_run_at: Optional[datetime] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_seconds > 0
+
+    # -------------------------------------------------------
+    # Cleanup
+    # -------------------------------------------------------
+
+    async def expire_sessions(self) -> int:
+        """Deactivate expired sessions, up to max_batches batches. Returns rows deactivated."""
+        total = 0
+        for _ in range(self.max_batches):
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    EXPIRE_BATCH, {"now": datetime.utcnow(), "batch_size": self.batch_size}
+                )
+                rows = result.fetchall()
+                await db.commit()
+
+            if not rows:
+                break
+            total += len(rows)
+            self.expired += len(rows)
+            SESSIONS_REAPED.inc("expired", amount=len(rows))
+
+            await invalidation_bus.invalidate_sessions([str(row[0]) for row in rows])
+            for session_id, user_id in rows:
+                await audit_log.log("session_expired", user_id=user_id, session_id=session_id)
+
+            if len(rows) < self.batch_size:
+                break
+        return total
+
+    async def _has_archive_table(self) -> bool:
+        if self._archive_table is None:
+            async with AsyncSessionLocal() as db:
+                found = await db.scalar(text("SELECT to_regclass('auth.sessions_archive') IS NOT NULL"))
+            self._archive_table = bool(found)
+            if not self._archive_table:
+                logger.warning("auth.sessions_archive does not exist; session archiving is off "
+                               "(apply db/ddl/create_sessions_archive.sql)")
+        return self._archive_table
+
+    async def archive_sessions(self) -> int:
+        """Move old inactive sessions to auth.sessions_archive. Returns rows moved."""
+        if self.archive_after_days <= 0 or not await self._has_archive_table():
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(days=self.archive_after_days)
+        total = 0
+        for _ in range(self.max_batches):
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(ARCHIVE_BATCH, {"cutoff": cutoff, "batch_size": self.batch_size})
+                moved = result.rowcount
+                await db.commit()
+
+            total += moved
+            self.archived += moved
+            SESSIONS_REAPED.inc("archived", amount=moved)
+            if moved < self.batch_size:
+                break
+        return total
+
+    async def run_once(self) -> Dict[str, int]:
+        """One reaper pass: expire, then archive. Errors are logged, not raised."""
+        expired_before, archived_before = self.expired, self.archived
+        try:
+            await self.expire_sessions()
+            await self.archive_sessions()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            self._archive_table = None  # Re-check on the next run
+            logger.error(f"Session reaper run failed: {e}")
+
+        # Batches committed before a failure still count
+        expired = self.expired - expired_before
+        archived = self.archived - archived_before
+        self.runs += 1
+        self.last_run_at = datetime.utcnow()
+        if expired or archived:
+            logger.info(f"Session reaper: {expired} expired sessions deactivated, {archived} archived")
+        return {"expired": expired, "archived": archived}
+
+    # -------------------------------------------------------
+    # Background task
+    # -------------------------------------------------------
+
+    async def _run(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start the periodic reaper task (call from application startup)."""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Session reaper started (every {self.interval_seconds}s, batch {self.batch_size})")
+
+    async def stop(self) -> None:
+        """Stop the reaper task (an interrupted batch is rolled back)."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return run counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "interval_seconds": self.interval_seconds,
+            "archive_after_days": self.archive_after_days,
+            "runs": self.runs,
+            "expired": self.expired,
+            "archived": self.archived,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+# Singleton instance
+session_reaper = SessionReaper(
+    interval_seconds=settings.session.reaper_interval_seconds,
+    batch_size=settings.session.reaper_batch_size,
+    max_batches=settings.session.reaper_max_batches,
+    archive_after_days=settings.session.archive_after_days,
+)
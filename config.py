@@ -5,6 +5,7 @@
 # -----------------------------------------------------------------
 
 from pydantic import field_validator
+from typing import Optional, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Application Settings
@@ -14,6 +15,17 @@ class AppSettings(BaseSettings):
     port: int = 8005
     debug: bool = True
     log_level: str = "INFO"  # Logging level: DEBUG, INFO, WARNING, ERROR, CRITICAL
+    patient_sections_lazy: bool = True        # Patient detail shell renders demographics; sections load via HTMX
+    patient_chart_single_query: bool = False  # Load patient detail in one JSON-aggregated query (WAN deployments)
+    icn_block_size: int = 10                  # ICNs reserved per sequence round trip (unused ones are skipped on restart)
+    demographics_cache_max_entries: int = 4096  # LRU bound on cached demographics rows (keyed by ICN)
+    demographics_cache_ttl_seconds: int = 300   # Backstop for writes outside this process (0 disables)
+    audit_enabled: bool = True                  # Write auth.audit_logs events via the background pipeline
+    audit_queue_max: int = 10000                # Events buffered in memory before producers feel backpressure
+    audit_batch_size: int = 500                 # Rows per INSERT
+    audit_linger_seconds: float = 0.5           # Max wait for a batch to fill before writing
+    audit_enqueue_timeout_seconds: float = 0.25 # Backpressure wait when the queue is full, then drop (logged)
+    metrics_enabled: bool = True                # Record per-route request metrics for GET /metrics
 
     # Pydantic will look for APP_NAME, APP_VERSION, APP_LOG_LEVEL, etc.
     model_config = SettingsConfigDict(
@@ -40,6 +52,15 @@ class SessionSettings(BaseSettings):
     secret_key: str
     timeout_minutes: int = 25
     cookie_name: str = 'med_z4_session_id'
+    cache_ttl_seconds: int = 30      # How long a validated session is served from memory (0 disables)
+    cache_max_entries: int = 1024    # LRU bound on cached sessions
+    activity_flush_seconds: float = 15.0  # Write-behind interval for last_activity_at updates
+    password_workers: int = 4        # bcrypt verifications run at once (worker threads, off the event loop)
+    password_queue_max: int = 64     # Logins allowed to wait for a worker before "busy" (0 = unbounded)
+    reaper_interval_seconds: float = 60.0  # Expired-session cleanup interval (0 disables the reaper)
+    reaper_batch_size: int = 1000    # Sessions deactivated per transaction
+    reaper_max_batches: int = 20     # Batches per run; a larger backlog carries over to the next run
+    archive_after_days: int = 0      # Move inactive sessions to auth.sessions_archive after N days (0 = keep)
 
     # Pydantic will look for SESSION_SECRET_KEY, SESSION_TIMEOUT_MINUTES, etc.
     model_config = SettingsConfigDict(
@@ -66,6 +87,13 @@ class SessionSettings(BaseSettings):
 class CCOWSettings(BaseSettings):
     base_url: str
     health_endpoint: str
+    timeout_seconds: float = 5.0              # Default timeout for CCOW Vault calls
+    max_connections: int = 100                # Shared client pool limit
+    max_keepalive_connections: int = 20       # Idle keep-alive connections retained
+    keepalive_expiry_seconds: float = 30.0    # Idle connection lifetime
+    http2: bool = False                       # Requires the optional 'h2' package
+    watch_interval_seconds: float = 3.0       # Per-user context watcher interval (WebSocket push)
+    lookup_ttl_seconds: float = 1.0           # Reuse get_active_patient results this long (0 disables)
 
     # Pydantic will look for CCOW_BASE_URL, CCOW_HEALTH_ENDPOINT, etc.
     model_config = SettingsConfigDict(
@@ -104,6 +132,17 @@ class PostgresSettings(BaseSettings):
     db: str = "medz1"
     user: str = "postgres"
     password: str
+    invalidation_enabled: bool = True                 # Cross-worker cache invalidation via LISTEN/NOTIFY
+    invalidation_channel: str = "med_z4_invalidate"   # NOTIFY channel shared by all med-z4 workers
+    invalidation_max_backoff_seconds: float = 30.0    # Listener reconnect backoff cap
+    pool_size: int = 5                      # Connections kept open per worker
+    pool_max_overflow: int = 10             # Extra connections allowed under burst load (closed when returned)
+    pool_timeout_seconds: float = 30.0      # Wait for a free connection before failing the request
+    pool_recycle_seconds: int = 1800        # Replace connections older than this (-1 disables)
+    statement_cache_size: int = 100         # asyncpg prepared statements cached per connection (0 for PgBouncer transaction mode)
+    echo_sql: bool = False                  # Log every SQL statement (very verbose; development only)
+    slow_query_ms: float = 250.0            # Statements at or over this go to the slow-query log (0 disables)
+    query_stats_max_statements: int = 200   # Distinct statement fingerprints tracked (the rest count as "other")
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -116,6 +155,11 @@ class PostgresSettings(BaseSettings):
         """Computed property: SQLAlchemy async connection string"""
         return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.db}"
 
+    @property
+    def dsn(self) -> str:
+        """Computed property: plain asyncpg DSN (for dedicated connections, e.g. LISTEN)"""
+        return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.db}"
+
     @field_validator("password")
     @classmethod
     def validate_password_required(cls, v: str) -> str:
@@ -125,6 +169,43 @@ class PostgresSettings(BaseSettings):
         return v
 
 
+# Read Replica Settings (optional; GET handlers read here via get_read_db)
+class ReplicaSettings(BaseSettings):
+    hosts: str = ""                   # Comma-separated host[:port] list (blank: reads go to the primary)
+    port: Optional[int] = None        # Default port for hosts without one (defaults to POSTGRES_PORT)
+    db: Optional[str] = None          # Defaults to POSTGRES_DB
+    user: Optional[str] = None        # Defaults to POSTGRES_USER
+    password: Optional[str] = None    # Defaults to POSTGRES_PASSWORD
+    strategy: str = "round_robin"     # round_robin or least_connections
+    max_lag_seconds: float = 5.0      # Replicas further behind than this are skipped
+    lag_check_seconds: float = 5.0    # How often replica lag is measured
+    read_your_writes_seconds: float = 10.0  # After a write, that session reads from the primary this long
+
+    # Pydantic will look for POSTGRES_REPLICA_HOSTS, POSTGRES_REPLICA_PORT, etc.
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="POSTGRES_REPLICA_",
+        extra="ignore"
+    )
+
+    @property
+    def host_list(self) -> List[str]:
+        return [host.strip() for host in self.hosts.split(",") if host.strip()]
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.host_list)
+
+    def database_url(self, host: str, primary: PostgresSettings) -> str:
+        """SQLAlchemy async connection string for one replica, filling gaps from the primary's settings"""
+        if ":" not in host:
+            host = f"{host}:{self.port or primary.port}"
+        return (
+            f"postgresql+asyncpg://{self.user or primary.user}:{self.password or primary.password}"
+            f"@{host}/{self.db or primary.db}"
+        )
+
+
 # Main Settings Container
 class Settings(BaseSettings):
     """
@@ -137,6 +218,7 @@ class Settings(BaseSettings):
     ccow: CCOWSettings = CCOWSettings()
     vista: VistaSettings = VistaSettings()
     postgres: PostgresSettings = PostgresSettings()
+    replica: ReplicaSettings = ReplicaSettings()
 
 
 # Instantiate the settings once to be imported elsewhere
@@ -5,11 +5,17 @@
 # Uses SQLAlchemy 2.x async with connection pooling
 # -----------------------------------------------------------
 
+from fastapi import Cookie
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from typing import AsyncGenerator
+from sqlalchemy import event
+from typing import AsyncGenerator, Optional
 import logging
+import time
 
 from  config import settings
+from app.services.query_stats import query_stats
+from app.services.pool_stats import InstrumentedPool, PRIMARY_POOL
+from app.services.replica_router import ReplicaRouter
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +23,56 @@ logger = logging.getLogger(__name__)
 # Async Database Engine (Singleton)
 # ---------------------------------------------------------------------
 
-engine = create_async_engine(
-    settings.postgres.database_url,
-    echo=settings.app.debug,         # Log SQL queries if debug=True
-    pool_pre_ping=True,              # Verify connections before use
-)
+def _create_engine(url: str, pool_name: str, **kwargs):
+    """
+    Create an async engine with the shared POSTGRES_* pool settings and
+    statement timing. pool_name keys its checkout stats (/monitoring/pool).
+    """
+    new_engine = create_async_engine(
+        url,
+        pool_logging_name=pool_name,
+        echo=settings.postgres.echo_sql,  # Log every SQL statement if POSTGRES_ECHO_SQL=true
+        pool_pre_ping=True,              # Verify connections before use
+        poolclass=InstrumentedPool,      # AsyncAdaptedQueuePool + checkout timing (/monitoring/pool)
+        pool_size=settings.postgres.pool_size,
+        max_overflow=settings.postgres.pool_max_overflow,
+        pool_timeout=settings.postgres.pool_timeout_seconds,
+        pool_recycle=settings.postgres.pool_recycle_seconds,
+        connect_args={"prepared_statement_cache_size": settings.postgres.statement_cache_size},
+        **kwargs,
+    )
+    event.listen(new_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return new_engine
+
+
+# ---------------------------------------------------------------------
+# Statement timing: per-fingerprint histograms on /metrics, top-N table
+# on /monitoring/queries, slow-query log (POSTGRES_SLOW_QUERY_MS)
+# ---------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._medz4_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    query_stats.record(statement, parameters, time.perf_counter() - context._medz4_started, executemany)
+
+
+# Primary (all writes, and reads that must see them)
+engine = _create_engine(settings.postgres.database_url, PRIMARY_POOL)
+
+# Reads on the primary (get_read_db fallback): AUTOCOMMIT, so a read-only
+# request sends no BEGIN/COMMIT round trips. Shares the primary's pool; the
+# isolation level is switched per checkout, client-side only.
+read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+# Read replicas (POSTGRES_REPLICA_HOSTS), one pool each, also AUTOCOMMIT
+replica_engines = [
+    (host, _create_engine(settings.replica.database_url(host, settings.postgres), host, isolation_level="AUTOCOMMIT"))
+    for host in settings.replica.host_list
+]
+
 
 # Async session factory (creates new AsyncSession objects)
 AsyncSessionLocal = async_sessionmaker(
@@ -32,6 +83,24 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Read-only session factory on the primary (never committed)
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+# Picks a replica (or the primary) for each get_read_db request
+replica_router = ReplicaRouter(
+    replicas=replica_engines,
+    primary_sessionmaker=ReadSessionLocal,
+    strategy=settings.replica.strategy,
+    max_lag_seconds=settings.replica.max_lag_seconds,
+    check_interval_seconds=settings.replica.lag_check_seconds,
+    read_your_writes_seconds=settings.replica.read_your_writes_seconds,
+)
+
 # ---------------------------------------------------------------------
 # Session Dependency for FastAPI
 # ---------------------------------------------------------------------
@@ -56,4 +125,26 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             logger.error(f"Database session error: {e}")
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+async def get_read_db(
+    session_id: Optional[str] = Cookie(None, alias=settings.session.cookie_name)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency for read-only handlers (GET pages and fragments).
+
+    Statements run in autocommit mode, so there is no BEGIN and no trailing
+    COMMIT. With POSTGRES_REPLICA_HOSTS set, replica_router picks a replica,
+    except for sessions that wrote recently (read-your-writes) or when no
+    replica is within POSTGRES_REPLICA_MAX_LAG_SECONDS. Each statement sees
+    its own snapshot; handlers that write must use get_db instead.
+    """
+    async with replica_router.sessionmaker_for(session_id)() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"Database read session error: {e}")
+            raise
+        finally:
+            await session.close()
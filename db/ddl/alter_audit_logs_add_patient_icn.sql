@@ -0,0 +1,21 @@
+-- -----------------------------------------------------------
+-- db/ddl/alter_audit_logs_add_patient_icn.sql
+-- -----------------------------------------------------------
+-- Patient ICN on audit events (patient_view, patient_create,
+-- patient_update, patient_delete, ccow_set, ...) written by
+-- app.services.audit_log.AuditPipeline.
+--
+-- Additive and safe to re-run. Until it is applied the audit
+-- pipeline still writes every event, without the ICN.
+--
+-- Run from project root:
+--   docker exec -i postgres16 psql -U postgres -d medz1 < db/ddl/alter_audit_logs_add_patient_icn.sql
+-- -----------------------------------------------------------
+
+ALTER TABLE auth.audit_logs
+    ADD COLUMN IF NOT EXISTS patient_icn VARCHAR(50);
+
+-- "Who accessed this patient's record" lookups, newest first
+CREATE INDEX IF NOT EXISTS idx_audit_logs_patient_icn
+    ON auth.audit_logs (patient_icn, event_timestamp DESC)
+    WHERE patient_icn IS NOT NULL;
@@ -0,0 +1,34 @@
+-- -----------------------------------------------------------
+-- db/ddl/create_icn_sequence.sql
+-- -----------------------------------------------------------
+-- Sequence backing med-z4 ICN allocation (ICN999001 - ICN999999)
+-- used by app.services.patient_crud_service.IcnAllocator.
+--
+-- Safe to re-run: the sequence is only ever advanced, never rewound,
+-- so blocks already handed out to running workers are not reissued.
+--
+-- Run from project root:
+--   docker exec -i postgres16 psql -U postgres -d medz1 < db/ddl/create_icn_sequence.sql
+-- -----------------------------------------------------------
+
+CREATE SEQUENCE IF NOT EXISTS clinical.med_z4_icn_seq
+    AS integer
+    MINVALUE 999001
+    MAXVALUE 999999
+    START WITH 999001
+    NO CYCLE;
+
+-- Continue after any ICN999xxx patients created before the sequence existed
+SELECT CASE
+         WHEN v.last_used >= 999001 THEN setval('clinical.med_z4_icn_seq', v.last_used, true)
+         ELSE setval('clinical.med_z4_icn_seq', 999001, false)
+       END
+FROM (
+    SELECT GREATEST(
+        (SELECT COALESCE(MAX(substring(icn FROM 4)::integer), 999000)
+           FROM clinical.patient_demographics
+          WHERE icn ~ '^ICN999[0-9]{3}$'),
+        (SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END
+           FROM clinical.med_z4_icn_seq)
+    ) AS last_used
+) v;
@@ -0,0 +1,20 @@
+-- -----------------------------------------------------------
+-- db/ddl/create_patient_last_updated_index.sql
+-- -----------------------------------------------------------
+-- Index behind the "Check Database" health probe's last-ETL timestamp
+-- (app.services.monitoring_service.get_database_health). With it,
+-- MAX(last_updated) reads one index entry instead of scanning
+-- clinical.patient_demographics.
+--
+-- Safe to re-run. CONCURRENTLY avoids locking the table against writes,
+-- so the statement must run outside a transaction block.
+--
+-- Run from project root:
+--   docker exec -i postgres16 psql -U postgres -d medz1 < db/ddl/create_patient_last_updated_index.sql
+-- -----------------------------------------------------------
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_demographics_last_updated
+    ON clinical.patient_demographics (last_updated);
+
+-- Refresh pg_class.reltuples, which the health probe reports as the patient count
+ANALYZE clinical.patient_demographics;
@@ -0,0 +1,34 @@
+-- -----------------------------------------------------------
+-- db/ddl/create_patient_roster_indexes.sql
+-- -----------------------------------------------------------
+-- Indexes supporting the keyset-paginated, searchable patient roster
+-- (app.services.patient_service.get_patient_roster).
+--
+-- Safe to re-run. CONCURRENTLY avoids locking the table against writes,
+-- so each statement must run outside a transaction block.
+--
+-- Run from project root:
+--   docker exec -i postgres16 psql -U postgres -d medz1 < db/ddl/create_patient_roster_indexes.sql
+-- -----------------------------------------------------------
+
+-- Keyset sort key: (name_last, name_first, icn) with NULL names as ''.
+-- Must match ROSTER_SORT_KEY in patient_service.py exactly.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_roster_keyset
+    ON clinical.patient_demographics ((COALESCE(name_last, '')), (COALESCE(name_first, '')), icn);
+
+-- Case-insensitive name prefix search (upper(name_last) LIKE 'DOE%')
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_roster_name_last_prefix
+    ON clinical.patient_demographics (upper(name_last) text_pattern_ops);
+
+-- ICN prefix search (icn LIKE 'ICN999%')
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_roster_icn_prefix
+    ON clinical.patient_demographics (icn text_pattern_ops);
+
+-- Exact-match filters
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_roster_ssn_last4
+    ON clinical.patient_demographics (ssn_last4);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_roster_station
+    ON clinical.patient_demographics (primary_station);
+
+ANALYZE clinical.patient_demographics;
@@ -0,0 +1,28 @@
+-- -----------------------------------------------------------
+-- db/ddl/create_session_indexes.sql
+-- -----------------------------------------------------------
+-- Partial indexes over active rows of auth.sessions, used by the
+-- active-sessions monitor (app.services.monitoring_service) and the
+-- expired-session reaper (app.services.session_reaper).
+--
+-- Both cover only is_active = TRUE rows, so they stay small however
+-- many logged-out and expired sessions the table accumulates.
+--
+-- Safe to re-run. CONCURRENTLY avoids locking the table against writes,
+-- so each statement must run outside a transaction block.
+--
+-- Run from project root:
+--   docker exec -i postgres16 psql -U postgres -d medz1 < db/ddl/create_session_indexes.sql
+-- -----------------------------------------------------------
+
+-- Active-sessions monitor: WHERE is_active ORDER BY created_at DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_active_created
+    ON auth.sessions (created_at)
+    WHERE is_active;
+
+-- Reaper: WHERE is_active AND expires_at < now() ORDER BY expires_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_active_expires
+    ON auth.sessions (expires_at)
+    WHERE is_active;
+
+ANALYZE auth.sessions;
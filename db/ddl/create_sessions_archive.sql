@@ -0,0 +1,35 @@
+-- -----------------------------------------------------------
+-- db/ddl/create_sessions_archive.sql
+-- -----------------------------------------------------------
+-- Optional archive table for old sessions. When
+-- SESSION_ARCHIVE_AFTER_DAYS > 0, the session reaper
+-- (app.services.session_reaper) moves inactive sessions that expired
+-- more than that many days ago from auth.sessions into this table.
+-- Without this table the reaper only deactivates expired sessions.
+--
+-- Safe to re-run.
+--
+-- Run from project root:
+--   docker exec -i postgres16 psql -U postgres -d medz1 < db/ddl/create_sessions_archive.sql
+-- -----------------------------------------------------------
+
+-- Same columns as auth.sessions (no foreign key, so archived rows
+-- never block user maintenance), plus when the row was archived
+CREATE TABLE IF NOT EXISTS auth.sessions_archive (
+    session_id        UUID PRIMARY KEY,
+    user_id           UUID NOT NULL,
+    created_at        TIMESTAMP,
+    last_activity_at  TIMESTAMP,
+    expires_at        TIMESTAMP NOT NULL,
+    ip_address        VARCHAR(45),
+    user_agent        VARCHAR(500),
+    archived_at       TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_archive_user
+    ON auth.sessions_archive (user_id, created_at);
+
+-- Archive candidates: WHERE NOT is_active AND expires_at < cutoff
+CREATE INDEX IF NOT EXISTS idx_sessions_inactive_expires
+    ON auth.sessions (expires_at)
+    WHERE NOT is_active;
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification under a concurrent login surge.
+
+Fires N concurrent bcrypt verifications two ways and measures event-loop
+lag with a probe task that sleeps 10 ms in a loop (lag = how late it
+wakes up). Run inline, bcrypt blocks the loop and lag grows with every
+login; on the password worker pool lag should stay flat.
+
+No database is needed: a hash is generated locally at the chosen cost.
+
+Run from project root:
+    python -m scripts.benchmark_login
+    python -m scripts.benchmark_login --logins 100 --cost 12 --workers 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import bcrypt
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.password_verifier import PasswordVerifier, check_password
+
+PROBE_INTERVAL = 0.010
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure event-loop lag during concurrent bcrypt logins")
+    parser.add_argument("--logins", type=int, default=50, help="Concurrent logins to simulate")
+    parser.add_argument("--cost", type=int, default=12, help="bcrypt cost factor of the test hash")
+    parser.add_argument("--workers", type=int, default=4, help="Password worker threads (SESSION_PASSWORD_WORKERS)")
+    return parser.parse_args()
+
+
+async def _probe(lags: list, stop: asyncio.Event) -> None:
+    """Record how late a 10 ms sleep wakes up while logins are running."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def _run(label: str, verify, logins: int, password: str, password_hash: str) -> None:
+    lags: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)  # Let the probe settle
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify(password, password_hash) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p95 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.95))]
+    print(f"{label:<12} {logins / elapsed:8.1f} logins/s   "
+          f"loop lag p50 {statistics.median(lags_ms):7.1f} ms   p95 {p95:7.1f} ms   max {lags_ms[-1]:7.1f} ms"
+          + ("" if all(results) else "   ❌ verification failed"))
+
+
+async def main() -> int:
+    args = parse_args()
+    password = "benchmark-password"
+    print(f"Hashing test password (bcrypt cost {args.cost})...")
+    password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=args.cost)).decode("utf-8")
+
+    async def inline(plain: str, hashed: str) -> bool:
+        return check_password(plain, hashed)  # Blocks the event loop (previous behaviour)
+
+    verifier = PasswordVerifier(max_workers=args.workers, max_waiting=0)
+
+    print(f"{args.logins} concurrent logins\n")
+    await _run("inline", inline, args.logins, password, password_hash)
+    await _run(f"pool ({args.workers})", verifier.verify, args.logins, password, password_hash)
+    verifier.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Bulk import patients from a CSV or NDJSON file.
+
+Streams the file through the same pipeline as POST /patient/import:
+rows are validated in batches, get 999-series ICNs in blocks (unless the
+file supplies an icn column), and are loaded with COPY, one transaction
+per batch. Rejected rows are listed by line number.
+
+Run from project root:
+    python -m scripts.import_patients patients.csv
+    python -m scripts.import_patients patients.ndjson --batch-size 5000
+    python -m scripts.import_patients export.txt --format csv --errors errors.ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from database import engine
+from app.services import patient_import_service
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk import patients into clinical.patient_demographics")
+    parser.add_argument("path", type=Path, help="CSV (with header row) or NDJSON file")
+    parser.add_argument("--format", choices=patient_import_service.IMPORT_FORMATS,
+                        help="File format (default: detect from extension)")
+    parser.add_argument("--batch-size", type=int, default=patient_import_service.DEFAULT_BATCH_SIZE,
+                        help="Rows per validation batch and COPY transaction")
+    parser.add_argument("--errors", type=Path,
+                        help="Write the rejected-row report to this file (NDJSON)")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+
+    fmt = patient_import_service.detect_format(args.path.name, args.format)
+    if not fmt:
+        print(f"❌ Cannot detect format of {args.path.name}; use --format csv|ndjson")
+        return 2
+
+    print(f"Importing {args.path} ({fmt}, batch size {args.batch_size})...")
+    try:
+        with args.path.open("rb") as source:
+            summary = await patient_import_service.import_patients(source, fmt, batch_size=args.batch_size)
+    finally:
+        await engine.dispose()
+
+    print(f"✅ Imported {summary['imported']} of {summary['total']} rows "
+          f"in {summary['elapsed_seconds']}s ({summary['rows_per_second']} rows/s, {summary['batches']} batches)")
+
+    if summary["failed"]:
+        print(f"⚠️  Rejected {summary['failed']} rows")
+        for error in summary["errors"][:20]:
+            messages = "; ".join(f"{field}: {message}" for field, message in error["errors"].items())
+            print(f"   line {error['line']}: {messages}")
+        if len(summary["errors"]) > 20 or summary["errors_truncated"]:
+            print("   ...")
+
+        if args.errors:
+            with args.errors.open("w") as report:
+                for error in summary["errors"]:
+                    report.write(json.dumps(error) + "\n")
+            print(f"   Error report written to {args.errors}"
+                  + (" (truncated)" if summary["errors_truncated"] else ""))
+
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
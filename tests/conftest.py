@@ -0,0 +1,18 @@
+# -----------------------------------------------------------
+# tests/conftest.py
+# -----------------------------------------------------------
+# Minimal settings so the app imports without a .env file.
+# Tests never touch Postgres: database access is stubbed per test.
+#
+# Run from project root: python -m pytest -q
+# -----------------------------------------------------------
+
+import os
+
+os.environ.setdefault("SESSION_SECRET_KEY", "test-secret-key-at-least-32-characters-long")
+os.environ.setdefault("CCOW_BASE_URL", "http://localhost:8001")
+os.environ.setdefault("CCOW_HEALTH_ENDPOINT", "/ccow/health")
+os.environ.setdefault("VISTA_BASE_URL", "http://localhost:8003")
+os.environ.setdefault("VISTA_HEALTH_ENDPOINT", "/health")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("APP_AUDIT_ENABLED", "false")
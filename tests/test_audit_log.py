@@ -0,0 +1,68 @@
+# -----------------------------------------------------------
+# tests/test_audit_log.py
+# -----------------------------------------------------------
+# AuditPipeline: column truncation and handling of rows the
+# database rejects (no Postgres; _write is stubbed)
+# -----------------------------------------------------------
+
+import asyncio
+
+import pytest
+from sqlalchemy.exc import DataError, OperationalError
+
+from app.services.audit_log import AuditPipeline
+
+
+def _pipeline() -> AuditPipeline:
+    return AuditPipeline(max_queue=100, batch_size=10, linger_seconds=0.01, enqueue_timeout_seconds=0.01)
+
+
+def test_log_truncates_values_to_column_widths():
+    pipeline = _pipeline()
+
+    async def run():
+        await pipeline.log("login_failed", email="x" * 1000 + "@va.gov", ip_address="1" * 100,
+                           failure_reason="Invalid credentials")
+        return pipeline._get_queue().get_nowait()
+
+    event = asyncio.run(run())
+    assert len(event["email"]) == 255
+    assert len(event["ip_address"]) == 45
+    assert event["failure_reason"] == "Invalid credentials"
+
+
+def test_rejected_rows_are_isolated_and_dropped():
+    pipeline = _pipeline()
+    written = []
+
+    async def fake_write(batch):
+        if any(event["email"] == "bad" for event in batch):
+            raise DataError("INSERT", {}, Exception("value too long"))
+        written.extend(batch)
+
+    pipeline._write = fake_write
+    batch = [{"event_type": "login", "email": email, "session_id": None}
+             for email in ("a", "b", "bad", "c", "d", "bad", "e")]
+
+    asyncio.run(pipeline._write_with_retry(batch))
+
+    assert [event["email"] for event in written] == ["a", "b", "c", "d", "e"]
+    assert pipeline.rejected == 2
+    assert pipeline.write_errors == 0
+
+
+def test_operational_errors_are_not_split_when_draining():
+    pipeline = _pipeline()
+    calls = []
+
+    async def fake_write(batch):
+        calls.append(len(batch))
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    pipeline._write = fake_write
+
+    with pytest.raises(OperationalError):
+        asyncio.run(pipeline._write_with_retry([{"event_type": "login", "email": "a", "session_id": None}] * 4,
+                                               retry=False))
+    assert calls == [4]
+    assert pipeline.rejected == 0
@@ -0,0 +1,27 @@
+# -----------------------------------------------------------
+# tests/test_metrics.py
+# -----------------------------------------------------------
+# /metrics exposition: running totals are counters, current
+# values are gauges
+# -----------------------------------------------------------
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def _types(body: str) -> dict:
+    return {
+        line.split()[2]: line.split()[3]
+        for line in body.splitlines() if line.startswith("# TYPE ")
+    }
+
+
+def test_scrape_time_totals_are_counters():
+    types = _types(TestClient(app).get("/metrics").text)
+
+    for name in ("medz4_cache_hits_total", "medz4_cache_misses_total", "medz4_cache_evictions_total",
+                 "medz4_invalidation_messages_total", "medz4_invalidation_reconnects_total"):
+        assert types[name] == "counter"
+    assert types["medz4_cache_size"] == "gauge"
+    assert all(name.endswith("_total") for name, kind in types.items() if kind == "counter")
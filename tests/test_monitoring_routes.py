@@ -0,0 +1,51 @@
+# -----------------------------------------------------------
+# tests/test_monitoring_routes.py
+# -----------------------------------------------------------
+# Monitoring fragments must not expose other users' sessions
+# -----------------------------------------------------------
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import monitoring
+from app.services.ccow_service import ccow_service
+from database import get_read_db
+from config import settings
+
+OWN_SESSION = "11111111-1111-1111-1111-111111111111"
+OTHER_SESSION = "22222222-2222-2222-2222-222222222222"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_read_db():
+        yield None
+
+    async def fake_validate_session(db, session_id):
+        return {"user_id": "00000000-0000-0000-0000-000000000001", "email": "clinician@va.gov",
+                "session_id": session_id}
+
+    monkeypatch.setattr(monitoring, "validate_session", fake_validate_session)
+    monkeypatch.setattr(ccow_service, "_lookup_stats", type(ccow_service._lookup_stats)())
+    app.dependency_overrides[get_read_db] = fake_read_db
+    try:
+        test_client = TestClient(app)
+        test_client.cookies.set(settings.session.cookie_name, OWN_SESSION)
+        yield test_client
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_ccow_lookups_lists_only_the_callers_session(client):
+    ccow_service._count_lookup(OWN_SESSION, "misses")
+    ccow_service._count_lookup(OTHER_SESSION, "hits")
+    ccow_service._count_lookup(OTHER_SESSION, "hits")
+
+    response = client.get("/monitoring/ccow-lookups")
+
+    assert response.status_code == 200
+    assert OWN_SESSION[:8] in response.text
+    assert OTHER_SESSION[:8] not in response.text
+    # Totals still cover every session
+    assert "<strong>Hits:</strong> 2" in response.text
@@ -0,0 +1,64 @@
+# -----------------------------------------------------------
+# tests/test_patient_crud_routes.py
+# -----------------------------------------------------------
+# Patient CRUD routes that load an existing patient through
+# patient_crud_service.get_patient_by_icn (demographics cache)
+# -----------------------------------------------------------
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import patient_crud
+from app.services.demographics_cache import demographics_cache
+from database import get_read_db
+from config import settings
+
+PATIENT = {
+    "patient_key": "ICN999001",
+    "icn": "ICN999001",
+    "name_last": "DOE",
+    "name_first": "JANE",
+    "name_display": "DOE, JANE",
+    "dob": None,
+    "death_date": None,
+    "sex": "F",
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_read_db():
+        yield None
+
+    async def fake_validate_session(db, session_id):
+        return {"user_id": "00000000-0000-0000-0000-000000000001", "email": "clinician@va.gov",
+                "session_id": session_id}
+
+    async def fake_load(db, icn):
+        return dict(PATIENT) if icn == PATIENT["icn"] else None
+
+    monkeypatch.setattr(patient_crud, "validate_session", fake_validate_session)
+    monkeypatch.setattr(demographics_cache, "load", fake_load)
+    app.dependency_overrides[get_read_db] = fake_read_db
+    try:
+        # No context manager: lifespan (CCOW client, background tasks) is not started
+        test_client = TestClient(app)
+        test_client.cookies.set(settings.session.cookie_name, "test-session")
+        yield test_client
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_edit_form_loads_existing_patient(client):
+    response = client.get(f"/patient/{PATIENT['icn']}/edit-form")
+
+    assert response.status_code == 200
+    assert "not found" not in response.text
+    assert "DOE" in response.text
+
+
+def test_edit_form_reports_unknown_patient(client):
+    response = client.get("/patient/ICN000000/edit-form")
+
+    assert "Patient ICN000000 not found" in response.text
@@ -0,0 +1,42 @@
+# -----------------------------------------------------------
+# tests/test_pool_stats.py
+# -----------------------------------------------------------
+# Checkout stats are kept per named pool, so replica pools do
+# not mix into the primary's /monitoring/pool figures
+# -----------------------------------------------------------
+
+from app.services.pool_stats import InstrumentedPool, get_pool_status
+
+
+class _FakeConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _pool(name=None) -> InstrumentedPool:
+    return InstrumentedPool(_FakeConnection, pool_size=2, max_overflow=0, logging_name=name)
+
+
+def test_checkouts_are_counted_per_pool():
+    primary, replica = _pool("test-primary"), _pool("test-replica")
+
+    for _ in range(3):
+        primary.connect().close()
+    replica.connect().close()
+
+    assert get_pool_status(primary)["checkouts"] == 3
+    assert get_pool_status(replica)["checkouts"] == 1
+    assert get_pool_status(replica)["name"] == "test-replica"
+
+
+def test_stats_survive_pool_recreate():
+    pool = _pool("test-recreated")
+    pool.connect().close()
+
+    recreated = pool.recreate()
+    recreated.connect().close()
+
+    assert get_pool_status(recreated)["checkouts"] == 2
@@ -0,0 +1,60 @@
+# -----------------------------------------------------------
+# tests/test_query_stats.py
+# -----------------------------------------------------------
+# SQL fingerprinting: statements that differ only in literal
+# values or list/batch length share one fingerprint
+# -----------------------------------------------------------
+
+from app.services.query_stats import fingerprint
+
+
+def _activity_flush_sql(rows: int, asyncpg: bool = False) -> str:
+    """The statement SessionActivityTracker.flush builds for a batch of `rows` sessions."""
+    if asyncpg:
+        # As compiled for asyncpg ($n placeholders), which is what the cursor events see
+        values_sql = ", ".join(
+            f"(CAST(${2 * i + 1}::UUID AS uuid), CAST(${2 * i + 2}::TIMESTAMP WITHOUT TIME ZONE AS timestamp))"
+            for i in range(rows)
+        )
+    else:
+        values_sql = ", ".join(
+            f"(CAST(:sid{i} AS uuid), CAST(:ts{i} AS timestamp))"
+            for i in range(rows)
+        )
+    return f"""
+        UPDATE auth.sessions AS s
+        SET last_activity_at = v.last_activity_at
+        FROM (VALUES {values_sql}) AS v(session_id, last_activity_at)
+        WHERE s.session_id = v.session_id
+          AND (s.last_activity_at IS NULL OR s.last_activity_at < v.last_activity_at)
+    """
+
+
+def test_activity_flush_batch_sizes_share_a_fingerprint():
+    for asyncpg in (False, True):
+        ids = {fingerprint(_activity_flush_sql(rows, asyncpg))[0] for rows in (1, 2, 3, 50, 1000)}
+        assert len(ids) == 1
+
+
+def test_activity_flush_normalized_text():
+    _, normalized = fingerprint(_activity_flush_sql(3))
+    assert "FROM (VALUES (CAST(? AS uuid), CAST(? AS timestamp))+) AS v" in normalized
+
+
+def test_in_lists_and_literals_collapse():
+    a = fingerprint("SELECT * FROM clinical.patient_demographics WHERE icn IN ($1, $2) AND age > 40")
+    b = fingerprint("SELECT * FROM clinical.patient_demographics WHERE icn IN ($1, $2, $3, $4) AND age > 65")
+    assert a == b
+    assert "IN (?+)" in a[1]
+
+
+def test_multi_row_insert_matches_single_row_insert():
+    single = fingerprint("INSERT INTO auth.audit_logs (user_id, event_type) VALUES ($1, $2)")
+    multi = fingerprint("INSERT INTO auth.audit_logs (user_id, event_type) VALUES ($1, $2), ($3, $4), ($5, $6)")
+    assert single == multi
+
+
+def test_different_statements_keep_different_fingerprints():
+    a = fingerprint("SELECT name_last FROM clinical.patient_demographics WHERE icn = $1")
+    b = fingerprint("SELECT name_first FROM clinical.patient_demographics WHERE icn = $1")
+    assert a[0] != b[0]